@@ -1,9 +1,9 @@
 import csv
+import itertools
 
-# text.txt 파일 내용을 읽어옵니다.
+# text.txt 파일을 엽니다. (전체를 readlines()로 올리지 않고 아래에서 한 줄씩 스트리밍)
 try:
-    with open('misc/text.txt', 'r', encoding='utf-8') as f:
-        lines = f.readlines()
+    input_file = open('misc/text.txt', 'r', encoding='utf-8')
 except FileNotFoundError:
     print("Error: text.txt 파일을 찾을 수 없습니다.")
     exit()
@@ -11,36 +11,30 @@ except Exception as e:
     print(f"Error reading file: {e}")
     exit()
 
-# CSV 데이터를 저장할 리스트
-data = []
-current_category = None
 lines_per_category = 11  # 카테고리 1줄 + 질문 10줄
 
-# 라인들을 11줄 단위로 처리
-for i in range(0, len(lines), lines_per_category):
-    # 현재 블록의 라인들을 가져옵니다.
-    block = [line.strip() for line in lines[i: i + lines_per_category] if line.strip()]
-
-    if not block:
-        continue
-
-    # 첫 번째 줄을 카테고리로 설정
-    current_category = block[0]
-
-    # 나머지 줄(최대 10개)을 질문으로 처리
-    # 파일 끝 부분에서 10개 미만의 질문이 있을 수 있음
-    for question_line in block[1:]:
-        data.append({'category': current_category, 'question': question_line})
-
 # CSV 파일 작성
 output_filename = 'misc/output.csv'
 try:
-    with open(output_filename, 'w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ['category', 'question']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-
-        writer.writeheader()
-        writer.writerows(data)
+    with input_file, open(output_filename, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(('category', 'question'))
+
+        # 라인들을 11줄 단위로 처리 (중간 리스트 없이 바로 기록)
+        line_iter = iter(input_file)
+        while True:
+            block = [line.strip() for line in itertools.islice(line_iter, lines_per_category)]
+            if not block:
+                break
+
+            block = [line for line in block if line]
+            if not block:
+                continue
+
+            # 첫 번째 줄을 카테고리로 설정하고 나머지 줄(최대 10개)을 질문으로 처리
+            # 파일 끝 부분에서 10개 미만의 질문이 있을 수 있음
+            current_category = block[0]
+            writer.writerows((current_category, question_line) for question_line in block[1:])
     print(f"Successfully created {output_filename} based on 1 category + 10 questions pattern.")
 
 except IOError:
@@ -1,35 +1,46 @@
 import asyncio
-import json
+import logging
+import logging.handlers
+import os
+import queue
 from itertools import chain
-from typing import List
+from typing import List, Set
 
-import jsonlines
+import orjson
 from tqdm.asyncio import tqdm
 
 # fetch_single_categorized_output 함수를 임포트합니다.
 from src import (
     DocType,
-    _fetch_classification_output,
+    _fetch_batch_classification_output,
+    _fetch_extracted_classified_output,
     _fetch_extracted_output,
-    _fetch_table_data_cell_wise_output,
+    _fetch_table_data_multi_cell_wise_output,
     _fetch_table_data_row_wise_output,
     check_valid_value,
-    duplicate_token_count,
     extract_table_with_preceding_text,
     get_text_from_html,
+    shutdown_fetchers,
     split_html,
+    token_set,
 )
 
+logger = logging.getLogger(__name__)
 
-def matched_chunk_with_html(html_chunks: List[str], chunk_content: str) -> str:
-    """duplicate 개수가 가장 큰 chunk를 반환"""
+
+def html_token_set(html: str) -> Set[str]:
+    """HTML 의 텍스트를 토큰 집합으로 변환"""
+    return token_set(get_text_from_html(html))
+
+
+def matched_chunk_with_html(html_chunks: List[str], html_chunk_tokens: List[Set[str]], chunk_content: str) -> str:
+    """duplicate 개수가 가장 큰 chunk를 반환 (html_chunk_tokens 는 html_chunks 각각의 html_token_set 결과)"""
     best_chunk = None
     max_duplicates = 0
-    chunk_content_text = get_text_from_html(chunk_content)
+    chunk_content_tokens = html_token_set(chunk_content)
 
-    for chunk in html_chunks:
-        chunk_text = get_text_from_html(chunk)
-        duplicate_count = duplicate_token_count(chunk_text, chunk_content_text)
+    for chunk, chunk_tokens in zip(html_chunks, html_chunk_tokens):
+        duplicate_count = len(chunk_tokens & chunk_content_tokens)
         if duplicate_count > max_duplicates:
             max_duplicates = duplicate_count
             best_chunk = chunk
@@ -37,115 +48,142 @@ def matched_chunk_with_html(html_chunks: List[str], chunk_content: str) -> str:
     return best_chunk
 
 
-async def process_data(company_name: str, parsed_file_path: str, raw_file_path: str, date: str, ticker: str):
+def read_text_file(path: str) -> str:
+    """UTF-8 텍스트 파일 전체를 읽음"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
 
-    with open(raw_file_path, 'r', encoding='utf-8') as f:
-        html_content = f.read()
 
-    with open(parsed_file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+def read_json_file(path: str):
+    """JSON 파일을 바이트로 읽어 orjson 으로 파싱"""
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read())
+
+
+async def process_data(
+        company_name: str,
+        parsed_file_path: str,
+        raw_file_path: str,
+        date: str,
+        ticker: str,
+        fuse_classification: bool = False,
+        skip_existing: bool = False,
+):
 
     quarter = f"{date[:4]} Q{(int(date[4:6]) - 1) // 3 + 1}"
 
-    index_contents_dict = {}
+    output_dir = "./data/result"
+    output_file = f"{output_dir}/{ticker}_{quarter.replace(' ', '_')}_{date}_{parsed_file_path.split('/')[-1].replace('.json', '')}.jsonl"
 
-    non_table_tasks = []
-    table_tasks = []
+    # 결과 파일은 작업이 모두 성공했을 때만 생기므로, 있으면 이전 실행에서 완료된 파일 (입력 파일을 읽기 전에 건너뜀)
+    if skip_existing and os.path.exists(output_file):
+        logger.info("Skipping %s: %s already exists", parsed_file_path, output_file)
+        return
 
-    for i, item in enumerate(data):
-        if 'content' in item and "<table>" not in item['content']:
-            non_table_tasks.append((i, item['content']))
-            index_contents_dict[i] = item["content"]
-
-        elif 'content' in item and "<table>" in item['content']:
-            table_tasks.append((i, item['content']))
-            index_contents_dict[i] = item["content"]
-
-    # 2. 추출 작업 병렬 실행 및 결과 수집
-    all_extracted_results = await tqdm.gather(
-        *[_fetch_extracted_output(company_name, c, quarter, DocType.FILING_8K) for _, c in non_table_tasks],
-        desc="Fetching extracted output"
-    )
+    os.makedirs(output_dir, exist_ok=True)
 
-    # 3. 분류 작업 및 결과 처리를 한 번에
-    extracted_items = [
-        (non_table_tasks[idx][0], extracted_result)
-        for idx, batch_results in enumerate(all_extracted_results)
-        for extracted_result in batch_results
-    ]
-
-    classification_results = await tqdm.gather(
-        *[
-            _fetch_classification_output(
-                company_name, index_contents_dict[item_idx], extracted_result, quarter, DocType.FILING_8K
-            )
-            for item_idx, extracted_result in extracted_items
-        ],
-        desc="Fetching classification output"
+    # 원문 HTML 과 파싱 결과를 스레드에서 동시에 읽음 (파일 읽기 동안 이벤트 루프가 멈추지 않음)
+    html_content, data = await asyncio.gather(
+        asyncio.to_thread(read_text_file, raw_file_path),
+        asyncio.to_thread(read_json_file, parsed_file_path),
     )
 
-    # 4. 최종 결과 생성
-    non_table_result = [
-        {
-            "index": item_idx,
-            "category": classification_result['category'],
-            "title": classification_result['title'],
-            "value": check_valid_value(html_content, extracted_result['value']),
-            "unit": classification_result['unit'],
-            "period": classification_result['period'],
-            "type_": classification_result['type_'],
-            "reference": extracted_result['reference']
-        }
-        for (item_idx, extracted_result), classification_result
-        in zip(extracted_items, classification_results)
-    ]
-
     html_chunks = split_html(html_content)
 
-    matched_table_html_chunks = [
-        (idx, extract_table_with_preceding_text(matched_chunk_with_html(html_chunks, c))["content"]) for idx, c in
-        table_tasks
-    ]
-
-    row_results = await tqdm.gather(
-        *[_fetch_table_data_row_wise_output(
-            {"index": idx, "reference": r}, company_name, quarter
-        ) for idx, r in matched_table_html_chunks
-        ],
-        desc="Extracting metrics from tables"
-    )
+    def build_table_reference(content: str) -> str:
+        return extract_table_with_preceding_text(matched_chunk_with_html(html_chunks, html_chunk_tokens, content))["content"]
+
+    async def process_text_item_fused(item_idx: int, content: str) -> None:
+        # 문장당 한 번의 호출로 추출과 분류를 함께 수행
+        classified_results = await _fetch_extracted_classified_output(company_name, content, quarter, DocType.FILING_8K)
+        writer.writelines(
+            orjson.dumps(
+                {
+                    "index": item_idx,
+                    "category": classified_result['category'],
+                    "title": classified_result['title'],
+                    "value": check_valid_value(html_content, classified_result['value']),
+                    "unit": classified_result['unit'],
+                    "period": classified_result['period'],
+                    "type_": classified_result['type_'],
+                    "reference": classified_result['reference']
+                }
+            ) + b"\n"
+            for classified_result in classified_results
+        )
+
+    async def process_text_item(item_idx: int, content: str) -> None:
+        # 추출이 끝나는 즉시 해당 아이템의 분류 작업을 시작
+        extracted_results = await _fetch_extracted_output(company_name, content, quarter, DocType.FILING_8K)
+        # 같은 청크에서 나온 메트릭들은 번호 목록으로 묶어 한 번에 분류
+        classification_results = await _fetch_batch_classification_output(
+            company_name, content, extracted_results, quarter, DocType.FILING_8K
+        )
+        for extracted_result, classification_result in zip(extracted_results, classification_results):
+            # 생성 즉시 기록 (이벤트 루프 안의 동기 write 이므로 레코드끼리 섞이지 않음)
+            writer.write(orjson.dumps(
+                {
+                    "index": item_idx,
+                    "category": classification_result.category,
+                    "title": classification_result.title,
+                    "value": check_valid_value(html_content, extracted_result['value']),
+                    "unit": classification_result.unit,
+                    "period": classification_result.period,
+                    "type_": classification_result.type_,
+                    "reference": extracted_result['reference']
+                }
+            ) + b"\n")
+
+    async def process_table_item(item_idx: int, content: str) -> None:
+        # HTML 매칭/테이블 파싱은 CPU 작업이므로 스레드로 넘겨 이벤트 루프가 LLM 요청을 계속 보낼 수 있게 함
+        reference = await asyncio.to_thread(build_table_reference, content)
+        # 행 단위 메트릭 추출이 끝나는 즉시 메트릭별 셀 추출을 시작
+        metrics = await _fetch_table_data_row_wise_output(
+            {"index": item_idx, "reference": reference}, company_name, quarter
+        )
+        # 같은 테이블의 메트릭들을 묶어 한 요청에서 셀 추출 (테이블을 메트릭마다 다시 보내지 않음)
+        cell_results = await _fetch_table_data_multi_cell_wise_output(metrics, company_name, quarter)
+        writer.writelines(orjson.dumps(metric) + b"\n" for metric in chain.from_iterable(cell_results))
+
+    # 코루틴은 TaskGroup 안에서 만들기 위해 (인덱스, 내용) 쌍만 모음 (앞 단계가 실패해도 실행되지 않은 코루틴이 남지 않음)
+    text_items = []
+    table_items = []
 
-    cell_results = await tqdm.gather(
-        *[_fetch_table_data_cell_wise_output(
-            metrics, company_name, quarter
-        ) for metrics in row_results
-        ],
-        desc="Extracting values from table cells"
-    )
+    for i, item in enumerate(data):
+        content = item.get('content')
+        if content is None:
+            continue
 
-    table_result = list(chain.from_iterable(cell_results))
-
-    output_file = f"./data/result/{ticker}_{quarter.replace(' ', '_')}_{date}_{parsed_file_path.split('/')[-1].replace('.json', '')}.jsonl"
-    print(type(table_result))
-    with jsonlines.open(output_file, mode='w') as writer:
-        for result in non_table_result:
-            writer.write(result)
-
-        # Check if table_data is a list of lists or list of dicts
-        if isinstance(table_result[0], list):
-            for table_item in table_result:
-                for metric in table_item:
-                    if isinstance(metric, dict):
-                        writer.write(metric)
-                    else:
-                        print(f"Warning: Non-dict metric found: {type(metric)}")
+        if "<table>" in content:
+            table_items.append((i, content))
         else:
-            # If table_data is a flat list of metrics
-            for metric in table_result:
-                if isinstance(metric, dict):
-                    writer.write(metric)
-                else:
-                    print(f"Warning: Non-dict metric found: {type(metric)}")
+            text_items.append((i, content))
+
+    if table_items:
+        # 테이블마다 모든 HTML 청크를 다시 파싱/토큰화하지 않도록 청크별 토큰 집합을 한 번만 계산
+        html_chunk_tokens = await asyncio.to_thread(lambda: [html_token_set(chunk) for chunk in html_chunks])
+
+    process_text = process_text_item_fused if fuse_classification else process_text_item
+
+    # 아이템별 파이프라인을 한 번에 실행 (단계별 대기 없음)
+    # TaskGroup: 한 아이템이 실패하면 나머지 작업을 취소한 뒤 파일을 닫음 (닫힌 파일에 쓰는 작업이 남지 않음)
+    # 임시 파일에 쓰고 성공 시에만 결과 경로로 교체 (중단된 실행이 불완전한 결과 파일을 남기지 않음)
+    partial_file = output_file + ".partial"
+    # 64KB 버퍼: 레코드 write 는 메모리 복사로 끝나고 디스크 write 는 버퍼가 찰 때만 발생
+    try:
+        with open(partial_file, 'wb', buffering=1 << 16) as writer, \
+                tqdm(total=len(text_items) + len(table_items), desc="Processing items") as progress:
+            async with asyncio.TaskGroup() as task_group:
+                for i, content in text_items:
+                    task_group.create_task(process_text(i, content)).add_done_callback(lambda _: progress.update())
+                for i, content in table_items:
+                    task_group.create_task(process_table_item(i, content)).add_done_callback(lambda _: progress.update())
+    except BaseException:
+        # 실패/취소된 실행의 임시 파일은 남기지 않음
+        if os.path.exists(partial_file):
+            os.remove(partial_file)
+        raise
+    os.replace(partial_file, output_file)
 
 
 if __name__ == "__main__":
@@ -159,4 +197,26 @@ if __name__ == "__main__":
     date = "20240913"
     ticker = "CMG"
 
-    asyncio.run(process_data(company_name, parsed_file_path, raw_file_path, date, ticker))
+    async def main():
+        try:
+            await process_data(company_name, parsed_file_path, raw_file_path, date, ticker)
+        finally:
+            # 프로세스 전체에서 공유한 커넥션 풀을 한 번만 정리
+            await shutdown_fetchers()
+
+    # 로그 출력(stderr I/O)은 QueueListener 스레드에서 처리하여 이벤트 루프를 막지 않음
+    log_queue = queue.SimpleQueue()
+    logging.basicConfig(level=logging.WARNING, handlers=[logging.handlers.QueueHandler(log_queue)])
+    log_listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler())
+    log_listener.start()
+
+    try:
+        try:
+            import uvloop
+        except ImportError:
+            # uvloop 미지원 환경(Windows 등)에서는 기본 이벤트 루프 사용
+            asyncio.run(main())
+        else:
+            uvloop.run(main())
+    finally:
+        log_listener.stop()
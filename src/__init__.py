@@ -1,42 +1,54 @@
-from .fetch import (
-    _fetch_classification_output,
-    _fetch_extracted_output,
-    _fetch_table_data_cell_wise_output,
-    _fetch_table_data_row_wise_output,
-)
-from .formats import DocType
-from .html_utils import (
-    get_text_from_html,
-    split_by_hr_blocks,
-    split_html,
-    split_html_by_table,
-)
-from .table_utils import (
-    extract_table_with_preceding_text,
-    is_numeric_value,
-    parse_html_table,
-    parse_html_table_to_markdown,
-)
-from .utils import (
-    check_valid_value,
-    chunk_8k_json,
-    chunk_10k_10q_html,
-    chunk_def14a_json,
-    chunk_earnings_html,
-    duplicate_token_count,
-    get_company_name,
-    get_sentences,
-    get_ticker_set,
-    split_list_into_n,
-    split_transcript_into_n,
-)
+import importlib
+from typing import Any, List
+
+# Public names and the submodule defining each; submodules are imported on first access (PEP 562) so that
+# e.g. `from src.table_utils import ...` does not pay for importing the OpenAI client stack in `src.fetch`
+_LAZY_ATTRS = {
+    "_fetch_batch_classification_output": "fetch",
+    "_fetch_classification_output": "fetch",
+    "_fetch_extracted_classified_output": "fetch",
+    "_fetch_extracted_output": "fetch",
+    "_fetch_table_data_cell_wise_output": "fetch",
+    "_fetch_table_data_multi_cell_wise_output": "fetch",
+    "_fetch_table_data_row_wise_output": "fetch",
+    "fetch_parsed_many": "fetch",
+    "shutdown_fetchers": "fetch",
+    "write_batch_input": "fetch",
+    "DocType": "formats",
+    "get_text_from_html": "html_utils",
+    "split_by_hr_blocks": "html_utils",
+    "split_html": "html_utils",
+    "split_html_by_table": "html_utils",
+    "extract_table_with_preceding_text": "table_utils",
+    "is_numeric_value": "table_utils",
+    "parse_html_table": "table_utils",
+    "parse_html_table_to_markdown": "table_utils",
+    "check_valid_value": "utils",
+    "chunk_8k_json": "utils",
+    "chunk_10k_10q_html": "utils",
+    "chunk_def14a_json": "utils",
+    "chunk_earnings_html": "utils",
+    "duplicate_token_count": "utils",
+    "get_company_name": "utils",
+    "get_sentences": "utils",
+    "get_ticker_set": "utils",
+    "split_list_into_n": "utils",
+    "split_transcript_into_n": "utils",
+    "token_set": "utils",
+}
 
 __all__ = [
     # Fetch functions
+    "_fetch_batch_classification_output",
     "_fetch_classification_output",
+    "_fetch_extracted_classified_output",
     "_fetch_extracted_output",
     "_fetch_table_data_cell_wise_output",
+    "_fetch_table_data_multi_cell_wise_output",
     "_fetch_table_data_row_wise_output",
+    "fetch_parsed_many",
+    "shutdown_fetchers",
+    "write_batch_input",
     # Formats
     "DocType",
     # Table utilities
@@ -56,8 +68,22 @@ __all__ = [
     "split_transcript_into_n",
     "check_valid_value",
     "duplicate_token_count",
+    "token_set",
     "split_html",
     "split_by_hr_blocks",
     "get_text_from_html",
     "split_html_by_table",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
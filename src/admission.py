@@ -0,0 +1,81 @@
+import asyncio
+import collections
+import time
+from typing import Deque
+
+__all__ = [
+    "AdaptiveConcurrencyLimiter",
+]
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Async context manager bounding the number of concurrent requests with a limit that adapts to rate limiting.
+
+    The limit starts at `max_concurrency`. Every `shrink` (called when the API answers 429) halves it, at most
+    once per `cooldown` seconds so that a burst of 429s from requests already in flight counts as one signal.
+    After `limit` consecutive successful requests it grows back by one, up to `max_concurrency`. Requests
+    already admitted are never interrupted; a lower limit only delays new admissions.
+
+    Args:
+        max_concurrency (`int`): Initial and maximum number of concurrent requests.
+        min_concurrency (`int`): Lower bound the limit never shrinks below.
+        cooldown (`float`): Minimum number of seconds between two shrinks.
+    """
+
+    def __init__(self, max_concurrency: int, min_concurrency: int = 1, cooldown: float = 1.0):
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min(min_concurrency, max_concurrency)
+        self.cooldown = cooldown
+        self.limit = max_concurrency
+
+        self._in_flight = 0
+        self._successes = 0
+        self._last_shrink = float("-inf")
+        self._waiters: Deque[asyncio.Future] = collections.deque()
+
+    async def __aenter__(self) -> None:
+        while self._in_flight >= self.limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # Hand the wake-up over to the next waiter instead of losing the free slot
+                if waiter.done() and not waiter.cancelled():
+                    self._wake_waiters()
+                raise
+            finally:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+        self._in_flight += 1
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self._in_flight -= 1
+        if exc_type is None:
+            self._successes += 1
+            if self._successes >= self.limit and self.limit < self.max_concurrency:
+                self.limit += 1
+                self._successes = 0
+        self._wake_waiters()
+
+    def shrink(self) -> None:
+        """Halves the limit in response to a rate-limit error."""
+        now = time.monotonic()
+        if now - self._last_shrink < self.cooldown:
+            return
+        self._last_shrink = now
+        self.limit = max(self.min_concurrency, self.limit // 2)
+        self._successes = 0
+
+    def _wake_waiters(self) -> None:
+        # Wake only as many waiters as there are free slots; the others keep sleeping
+        free = self.limit - self._in_flight
+        for waiter in self._waiters:
+            if free <= 0:
+                break
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
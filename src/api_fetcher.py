@@ -1,29 +1,118 @@
+import contextlib
+import logging
 import os
+import random
 from abc import ABC, abstractmethod
-from typing import Generic, Optional, Type, TypeVar, Union
+from typing import AsyncContextManager, Callable, Generic, List, Optional, Type, TypeVar, Union
 
 import dotenv
 import groq
 import httpx
 import openai
-from openai import AsyncStream, Stream
+from openai import AsyncStream, DefaultAioHttpClient, DefaultAsyncHttpxClient, Stream
 from openai.types.chat import ChatCompletion as OpenAIChatCompletion
 from openai.types.chat import ChatCompletionChunk as OpenAIChatCompletionChunk
 from openai.types.chat import ParsedChatCompletion as OpenAIParsedChatCompletion
 from pydantic import BaseModel
+from tenacity import retry, retry_if_exception, stop_after_attempt
 
-from src.utils import retry_fetch
+from src._default import DEFAULT_EMPTY_PARSED_COMPLETION, DEFAULT_OPENAI_KWARGS
 
 BaseModelType = Type[BaseModel]
 
 dotenv.load_dotenv()
 
 __all__ = [
-    "OpenAIAPIFetcher",
     "AsyncOpenAIAPIFetcher",
-    "AsyncDatabricksAPIFetcher"
+    "AsyncDatabricksAPIFetcher",
+    "add_rate_limit_callback",
+    "retry_fetch",
 ]
 
+
+def handle_max_retries(retry_state):
+    """Logs only the last error message after max retries are exhausted."""
+    last_exception = retry_state.outcome.exception()
+    if last_exception:
+        logging.error(f"Task {retry_state.args[0]} failed after max retries: {str(last_exception)[:20]}")
+    return DEFAULT_EMPTY_PARSED_COMPLETION
+
+
+def wait_full_jitter(wait_seconds: float, max_wait: float):
+    """
+    Builds a tenacity wait strategy using full-jitter exponential backoff.
+
+    The delay before attempt `n` is drawn uniformly from `[0, min(max_wait, wait_seconds * 2 ** (n - 1))]`,
+    which keeps concurrent callers from retrying in lockstep. On OpenAI rate-limit errors the
+    server's `Retry-After` header is honored when present.
+
+    Args:
+        wait_seconds (`float`): Base delay of the exponential schedule.
+        max_wait (`float`): Upper bound on any single delay.
+
+    Returns:
+        `Callable`: A wait function accepting a tenacity `RetryCallState`.
+    """
+
+    def wait(retry_state) -> float:
+        last_exception = retry_state.outcome.exception()
+        if isinstance(last_exception, openai.RateLimitError):
+            retry_after = last_exception.response.headers.get("retry-after")
+            if retry_after:
+                try:
+                    return min(float(retry_after), max_wait)
+                except ValueError:
+                    pass
+        return random.uniform(0, min(max_wait, wait_seconds * 2 ** (retry_state.attempt_number - 1)))
+
+    return wait
+
+
+def is_retryable_error(exception: BaseException) -> bool:
+    """
+    Checks whether an API error is transient and worth retrying.
+
+    Mirrors the OpenAI SDK's own policy: connection errors and timeouts, plus 408, 409, 429 and 5xx responses.
+    Other errors (bad requests, authentication, invalid schemas) fail immediately instead of burning retries.
+    """
+    if isinstance(exception, openai.APIConnectionError):
+        return True
+    if isinstance(exception, openai.APIStatusError):
+        return exception.status_code in (408, 409, 429) or exception.status_code >= 500
+    return False
+
+
+# Callbacks run whenever a request is about to be retried after an OpenAI rate-limit error
+_rate_limit_callbacks: List[Callable[[], None]] = []
+
+
+def add_rate_limit_callback(callback: Callable[[], None]) -> None:
+    """
+    Registers `callback` to be called each time `retry_fetch` backs off from an OpenAI rate-limit error.
+
+    Args:
+        callback (`Callable[[], None]`): Called without arguments, from the retrying task.
+    """
+    _rate_limit_callbacks.append(callback)
+
+
+def notify_rate_limit(retry_state) -> None:
+    """Tenacity `before_sleep` hook running the registered rate-limit callbacks on 429 responses."""
+    if isinstance(retry_state.outcome.exception(), openai.RateLimitError):
+        for callback in _rate_limit_callbacks:
+            callback()
+
+
+# Create a reusable decorator for retrying async functions
+def retry_fetch(wait_seconds: float, max_retries: int, max_wait: float = 30.0):
+    return retry(
+        retry=retry_if_exception(is_retryable_error),  # Only transient errors are retried
+        stop=stop_after_attempt(max_retries),  # Up to `max_retries` attempts
+        wait=wait_full_jitter(wait_seconds, max_wait),  # Full-jitter exponential backoff between retries
+        before_sleep=notify_rate_limit,  # Let concurrency limiters back off on 429s
+        retry_error_callback=handle_max_retries  # Log only the last error
+    )
+
 # ----------------------------------------
 # TypeVar definitions (from your original question)
 # ----------------------------------------
@@ -99,10 +188,10 @@ class AsyncAPIFetcher(BaseAPIFetcher[_AsyncClientT], ABC):
     async def fetch_chat_completion(self, url: str) -> str:
         """Method to send an asynchronous request or perform some async operation."""
 
-    def close(self) -> None:
+    async def close(self) -> None:
         """Handles resource cleanup for asynchronous clients."""
         if hasattr(self.client, "close"):
-            self.client.close()
+            await self.client.close()
 
 
 # ===================================================
@@ -111,29 +200,45 @@ class AsyncAPIFetcher(BaseAPIFetcher[_AsyncClientT], ABC):
 class OpenAIAPIFetcher(SyncAPIFetcher[openai.OpenAI]):
     """
     Synchronous Fetcher specialized for OpenAI's API.
+
+    Not used by the async pipeline; the underlying `openai.OpenAI` client (and its connection pool)
+    is only created on first access so that merely importing this module does not open a second pool.
     """
 
     def __init__(self, client: Optional[openai.OpenAI] = None):
-        if client is None:
-            client = openai.OpenAI()
         super().__init__(client)
 
-    @retry_fetch(0.01, 1)
+    @property
+    def client(self) -> openai.OpenAI:
+        if self._client is None:
+            self._client = openai.OpenAI()
+        return self._client
+
+    @client.setter
+    def client(self, client: Optional[openai.OpenAI]) -> None:
+        self._client = client
+
+    def close(self) -> None:
+        """Closes the client only if it was ever created."""
+        if self._client is not None:
+            self._client.close()
+
+    @retry_fetch(0.5, 5)
     def fetch_chat_completion(self, **kwargs) -> OpenAIChatCompletion | Stream[OpenAIChatCompletionChunk]:
         """Example fetch method simulating a request to OpenAI."""
 
         return self.client.chat.completions.create(**kwargs)
 
-    @retry_fetch(0.01, 1)
+    @retry_fetch(0.5, 5)
     def fetch_parsed_completion(self, **kwargs) -> OpenAIParsedChatCompletion:
         """Example fetch method simulating a request to OpenAI."""
 
         return self.client.beta.chat.completions.parse(**kwargs)
 
-    @retry_fetch(0.01, 1)
+    @retry_fetch(0.5, 5)
     def fetch_parsed_output(self, content: str, response_format: BaseModelType) -> OpenAIParsedChatCompletion:
         return self.client.beta.chat.completions.parse(
-            model="gpt-4.1-mini-2025-04-14",
+            **DEFAULT_OPENAI_KWARGS,
             messages=[
                 {
                     "role": "user",
@@ -143,7 +248,6 @@ If it is not possible, return an empty value with the given response format.
 """
                 }
             ],
-            temperature=0.0,
             response_format=response_format,
         )
 
@@ -154,56 +258,105 @@ If it is not possible, return an empty value with the given response format.
 class AsyncOpenAIAPIFetcher(AsyncAPIFetcher[openai.AsyncOpenAI]):
     """
     Asynchronous Fetcher specialized for OpenAI's API.
+
+    `attempt_context`, when given, is called for every attempt of a retried request and the request is sent
+    inside the returned async context manager, so that e.g. concurrency slots are not held during retry backoff.
     """
 
-    def __init__(self, client: Optional[openai.AsyncOpenAI] = None):
+    def __init__(
+            self,
+            client: Optional[openai.AsyncOpenAI] = None,
+            max_connections: int = 2000,
+            max_keepalive: int = 1500,
+            timeout: float = 120.0,
+            http2: bool = False,
+            attempt_context: Optional[Callable[[], AsyncContextManager]] = None,
+    ):
         if client is None:
-            client = openai.AsyncOpenAI()
+            client = openai.AsyncOpenAI(
+                max_retries=0,  # retries are handled by `retry_fetch`
+                http_client=self._build_http_client(max_connections, max_keepalive, timeout, http2)
+            )
         super().__init__(client)
-
-    @retry_fetch(0.01, 1)
+        self.attempt_context = attempt_context
+
+    def _attempt(self) -> AsyncContextManager:
+        return self.attempt_context() if self.attempt_context is not None else contextlib.nullcontext()
+
+    @staticmethod
+    def _build_http_client(
+            max_connections: int,
+            max_keepalive: int,
+            timeout: float,
+            http2: bool = False,
+    ) -> httpx.AsyncClient:
+        """
+        Builds the shared HTTP client backing the OpenAI client.
+
+        aiohttp transport scales much better than the default httpx one under high fan-out. With `http2=True`
+        an HTTP/2 httpx client is used instead, multiplexing concurrent requests over a few connections.
+        Connect/pool timeouts are left unset so that requests queued behind the pool are not cancelled.
+        """
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+        timeout = httpx.Timeout(timeout, connect=None, pool=None)
+        if http2:
+            return DefaultAsyncHttpxClient(http2=True, limits=limits, timeout=timeout)
+        return DefaultAioHttpClient(limits=limits, timeout=timeout)
+
+    @retry_fetch(0.5, 5)
     async def fetch_chat_completion(self, **kwargs) -> OpenAIChatCompletion | AsyncStream[OpenAIChatCompletionChunk]:
         """Example fetch method simulating a request to OpenAI."""
 
-        return await self.client.chat.completions.create(**kwargs)
-
-    retry_fetch(0.01, 1)
+        async with self._attempt():
+            return await self.client.chat.completions.create(**kwargs)
 
+    @retry_fetch(0.5, 5)
     async def fetch_parsed_completion(self, **kwargs) -> OpenAIParsedChatCompletion:
         """Example fetch method simulating a request to OpenAI."""
 
-        return await self.client.beta.chat.completions.parse(**kwargs)
-
-    retry_fetch(0.01, 1)
+        async with self._attempt():
+            return await self.client.beta.chat.completions.parse(**kwargs)
 
+    @retry_fetch(0.5, 5)
     async def fetch_parsed_output(self, content: str, response_format: BaseModelType) -> OpenAIParsedChatCompletion:
-        return await self.client.beta.chat.completions.parse(
-            model="gpt-4.1-mini-2025-04-14",
-            messages=[
-                {
-                    "role": "user",
-                    "content": f"""
+        async with self._attempt():
+            return await self.client.beta.chat.completions.parse(
+                **DEFAULT_OPENAI_KWARGS,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": f"""
 Given the following data, format it with the given response format: {content}.
 If it is not possible, return an empty value with the given response format.
 """
-                }
-            ],
-            temperature=0.0,
-            response_format=response_format,
-        )
+                    }
+                ],
+                response_format=response_format,
+            )
 
 
 class AsyncDatabricksAPIFetcher(AsyncOpenAIAPIFetcher):
 
-    def __init__(self, client: Optional[openai.AsyncOpenAI] = None):
+    def __init__(
+            self,
+            client: Optional[openai.AsyncOpenAI] = None,
+            max_connections: int = 2000,
+            max_keepalive: int = 1500,
+            timeout: float = 120.0,
+            http2: bool = False,
+            attempt_context: Optional[Callable[[], AsyncContextManager]] = None,
+    ):
         if client is None:
             client = openai.AsyncOpenAI(
                 api_key=os.getenv("DATABRICKS_TOKEN"),
-                base_url="https://dbc-449ecea5-a3a3.cloud.databricks.com/serving-endpoints"
+                base_url="https://dbc-449ecea5-a3a3.cloud.databricks.com/serving-endpoints",
+                max_retries=0,  # retries are handled by `retry_fetch`
+                http_client=self._build_http_client(max_connections, max_keepalive, timeout, http2),
             )
-        super().__init__(client)
+        super().__init__(client, attempt_context=attempt_context)
 
     async def fetch_chat_completion(self, **kwargs) -> OpenAIChatCompletion | AsyncStream[OpenAIChatCompletionChunk]:
         """Example fetch method simulating a request to OpenAI."""
 
-        return await self.client.chat.completions.create(**kwargs)
+        async with self._attempt():
+            return await self.client.chat.completions.create(**kwargs)
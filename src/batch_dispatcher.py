@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import uuid
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+import openai
+import orjson
+from openai.types.chat import ChatCompletion
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "AsyncBatchDispatcher",
+    "batch_request_line",
+    "write_batch_requests",
+]
+
+_BATCH_ENDPOINT = "/v1/chat/completions"
+_TERMINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+
+def batch_request_line(custom_id: str, body: Dict[str, Any]) -> bytes:
+    """
+    Serializes one chat-completion request as a line of a Batch API input file.
+
+    Args:
+        custom_id (`str`): Identifier echoed back in the matching output line.
+        body (`Dict[str, Any]`): Request body for `/v1/chat/completions`.
+
+    Returns:
+        `bytes`: The JSONL line, including its trailing newline.
+    """
+    return orjson.dumps({"custom_id": custom_id, "method": "POST", "url": _BATCH_ENDPOINT, "body": body}) + b"\n"
+
+
+def write_batch_requests(path: str, requests: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+    """
+    Streams requests into a Batch API input file without holding them all in memory.
+
+    Args:
+        path (`str`): Destination JSONL file.
+        requests (`Iterable[Tuple[str, Dict[str, Any]]]`): Pairs of custom id and request body.
+
+    Returns:
+        `int`: Number of requests written.
+    """
+    count = 0
+    with open(path, "wb", buffering=1 << 20) as f:
+        for custom_id, body in requests:
+            f.write(batch_request_line(custom_id, body))
+            count += 1
+    return count
+
+
+class AsyncBatchDispatcher:
+    """
+    Collects chat-completion requests and sends them through OpenAI's Batch API.
+
+    Each `submit` call enqueues one request body and returns once the batch containing it has finished.
+    Queued requests are flushed into a single JSONL batch job when `max_batch_size` requests are waiting
+    or `flush_interval` seconds after the first one was queued, whichever comes first. Batch jobs are
+    billed at roughly half the synchronous price but may take up to 24 hours, so only use this for
+    non-interactive workloads.
+
+    Args:
+        client (`openai.AsyncOpenAI`): Client used to upload files and manage batch jobs.
+        max_batch_size (`int`): Maximum number of requests packed into one batch job.
+        flush_interval (`float`): Seconds to wait for more requests before flushing a partial batch.
+        poll_interval (`float`): Initial delay between batch status checks; doubles up to `max_poll_interval`.
+        max_poll_interval (`float`): Upper bound on the delay between batch status checks.
+    """
+
+    def __init__(
+            self,
+            client: openai.AsyncOpenAI,
+            max_batch_size: int = 10000,
+            flush_interval: float = 5.0,
+            poll_interval: float = 15.0,
+            max_poll_interval: float = 300.0,
+    ):
+        self.client = client
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+
+        self._pending: Dict[str, Tuple[Dict[str, Any], asyncio.Future]] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._jobs: Set[asyncio.Task] = set()
+
+    async def submit(self, body: Dict[str, Any]) -> ChatCompletion:
+        """
+        Queues a chat-completion request and waits for its result.
+
+        Args:
+            body (`Dict[str, Any]`): Request body for `/v1/chat/completions` (no client-side options such as `timeout`).
+
+        Returns:
+            `ChatCompletion`: The completion produced by the batch job.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending[uuid.uuid4().hex] = (body, future)
+
+        if len(self._pending) >= self.max_batch_size:
+            self.flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.flush_interval, self.flush)
+
+        return await future
+
+    def flush(self) -> None:
+        """Starts a batch job for every queued request."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+
+        job = asyncio.ensure_future(self._run_batch(pending))
+        self._jobs.add(job)
+        job.add_done_callback(self._jobs.discard)
+
+    async def close(self) -> None:
+        """Cancels queued requests and running batch jobs."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        for _, future in self._pending.values():
+            future.cancel()
+        self._pending = {}
+
+        for job in list(self._jobs):
+            job.cancel()
+        await asyncio.gather(*self._jobs, return_exceptions=True)
+
+    async def _run_batch(self, pending: Dict[str, Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        try:
+            jsonl = b"".join(batch_request_line(custom_id, body) for custom_id, (body, _) in pending.items())
+            input_file = await self.client.files.create(file=("batch.jsonl", jsonl), purpose="batch")
+            batch = await self.client.batches.create(
+                input_file_id=input_file.id, endpoint=_BATCH_ENDPOINT, completion_window="24h"
+            )
+            logger.info(f"Submitted batch {batch.id} with {len(pending)} requests")
+
+            delay = self.poll_interval
+            while batch.status not in _TERMINAL_STATUSES:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_poll_interval)
+                batch = await self.client.batches.retrieve(batch.id)
+
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if file_id:
+                    content = await self.client.files.content(file_id)
+                    for line in content.content.splitlines():
+                        if line.strip():
+                            self._resolve(pending, orjson.loads(line))
+
+            for custom_id, (_, future) in pending.items():
+                if not future.done():
+                    future.set_exception(
+                        RuntimeError(f"Batch {batch.id} ended with status '{batch.status}' without a result for {custom_id}")
+                    )
+
+        except asyncio.CancelledError:
+            for _, future in pending.values():
+                future.cancel()
+            raise
+
+        except Exception as e:
+            for _, future in pending.values():
+                if not future.done():
+                    future.set_exception(e)
+
+    @staticmethod
+    def _resolve(pending: Dict[str, Tuple[Dict[str, Any], asyncio.Future]], record: Dict[str, Any]) -> None:
+        entry = pending.get(record.get("custom_id"))
+        if entry is None or entry[1].done():
+            return
+        future = entry[1]
+
+        response = record.get("response") or {}
+        if response.get("status_code") == 200:
+            future.set_result(ChatCompletion.model_validate(response["body"]))
+        else:
+            future.set_exception(RuntimeError(f"Batch request failed: {record.get('error') or response.get('body')}"))
@@ -1,47 +1,409 @@
+import asyncio
+import contextlib
+import functools
+import hashlib
 import logging
-import traceback
-from typing import Dict, List, Tuple, Type
+import os
+from itertools import chain
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Sequence, Tuple, Type
 
+import orjson
+from aiolimiter import AsyncLimiter
+from openai.lib._pydantic import to_strict_json_schema
 from pydantic import BaseModel
 from tqdm.asyncio import tqdm_asyncio
 
 from src._default import DEFAULT_DATABRICKS_KWARGS, DEFAULT_OPENAI_KWARGS
-from src.api_fetcher import AsyncDatabricksAPIFetcher, AsyncOpenAIAPIFetcher
+from src.admission import AdaptiveConcurrencyLimiter
+from src.api_fetcher import AsyncDatabricksAPIFetcher, AsyncOpenAIAPIFetcher, add_rate_limit_callback
+from src.batch_dispatcher import AsyncBatchDispatcher, write_batch_requests
 from src.formats import (
+    BatchedClassificationOutput,
+    BatchedExtractedOutput,
     CellListOutput,
+    CellOutput,
     ClassificationOutput,
+    ClassifiedMetricListOutput,
     DocType,
     ExtractedOutput,
     MetricListOutput,
+    MultiMetricCellListOutput,
 )
+from src.generative_cache import GenerativeCache
 from src.messages import (
+    get_8k_batch_classification_message,
+    get_8k_batch_extraction_message,
     get_8k_classification_message,
-    get_8k_extraction_message,
+    get_8k_extraction_classification_message,
+    get_earnings_batch_classification_message,
+    get_earnings_batch_extraction_message,
     get_earnings_classification_message,
-    get_earnings_extraction_message,
     get_table_cell_wise_messages,
+    get_table_multi_cell_wise_messages,
     get_table_row_wise_messages,
+    make_8k_extraction_message,
+    make_earnings_extraction_message,
 )
-from src.utils import get_sentences
+from src.utils import get_sentences, has_digit
 
 BaseModelType = Type[BaseModel]
 
 logger = logging.getLogger(__name__)
-openai_async_fetcher = AsyncOpenAIAPIFetcher()
-databricks_async_fetcher = AsyncDatabricksAPIFetcher()
+
+_openai_async_fetcher: AsyncOpenAIAPIFetcher | None = None
+_databricks_async_fetcher: AsyncDatabricksAPIFetcher | None = None
+_batch_dispatcher: AsyncBatchDispatcher | None = None
+_response_cache: GenerativeCache | None = None
+
+# SQLite file persisting LLM responses across runs (unset keeps responses in memory only)
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "")
+
+# Number of LLM responses kept in memory by the response cache
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "4096"))
+
+# Talk to the OpenAI API over HTTP/2 (httpx) instead of HTTP/1.1 (aiohttp)
+OPENAI_HTTP2 = os.getenv("OPENAI_HTTP2", "0") == "1"
+
+# Send OpenAI requests through the Batch API (about half the price, up to 24h turnaround) for offline runs
+USE_BATCH_API = os.getenv("OPENAI_USE_BATCH_API", "0") == "1"
+
+# Caps the number of in-flight LLM requests shared by every fan-out below; the cap is halved on 429 responses
+# and grows back by one after each window of successful requests
+_LLM_SEM = AdaptiveConcurrencyLimiter(int(os.getenv("LLM_MAX_CONCURRENCY", "32")))
+add_rate_limit_callback(_LLM_SEM.shrink)
+
+# Optional token bucket keeping OpenAI requests under the account's requests-per-minute limit (0 disables it)
+_OPENAI_MAX_RPM = int(os.getenv("OPENAI_MAX_RPM", "0"))
+_OPENAI_RATE_LIMITER = AsyncLimiter(_OPENAI_MAX_RPM, 60) if _OPENAI_MAX_RPM > 0 else None
+
+# Maximum number of sentences, and of their characters (~4 per token), packed into a single extraction request
+EXTRACTION_BATCH_SIZE = int(os.getenv("EXTRACTION_BATCH_SIZE", "20"))
+EXTRACTION_BATCH_MAX_CHARS = int(os.getenv("EXTRACTION_BATCH_MAX_CHARS", "8000"))
+
+# Sentences without any digit cannot state a metric value, so they are not sent for extraction
+SKIP_LINES_WITHOUT_DIGITS = os.getenv("SKIP_LINES_WITHOUT_DIGITS", "1") == "1"
+
+# Maximum number of metrics from the same chunk classified in a single request
+CLASSIFICATION_BATCH_SIZE = int(os.getenv("CLASSIFICATION_BATCH_SIZE", "32"))
+
+# Number of metrics of one table packed into a single cell-wise extraction request
+CELL_WISE_BATCH_SIZE = int(os.getenv("CELL_WISE_BATCH_SIZE", "8"))
+
+# In-flight `fetch_parsed` calls keyed by a digest of the full request (single-flight); completed results are
+# reused through the bounded response cache instead
+_fetch_parsed_tasks: Dict[str, asyncio.Task] = {}
+
+
+@contextlib.asynccontextmanager
+async def _openai_attempt() -> AsyncIterator[None]:
+    """Admits one OpenAI request attempt: an `_LLM_SEM` slot plus, when configured, a requests-per-minute token."""
+    async with _LLM_SEM:
+        if _OPENAI_RATE_LIMITER is not None:
+            await _OPENAI_RATE_LIMITER.acquire()
+        yield
+
+
+def get_openai_fetcher() -> AsyncOpenAIAPIFetcher:
+    """
+    Returns the process-wide OpenAI fetcher, creating it on first use.
+
+    All requests share its client so keep-alive connections are reused across `process_data` calls.
+    """
+    global _openai_async_fetcher
+    if _openai_async_fetcher is None:
+        _openai_async_fetcher = AsyncOpenAIAPIFetcher(http2=OPENAI_HTTP2, attempt_context=_openai_attempt)
+    return _openai_async_fetcher
+
+
+def get_databricks_fetcher() -> AsyncDatabricksAPIFetcher:
+    """
+    Returns the process-wide Databricks fetcher, creating it on first use.
+
+    It keeps its own connection pool since it talks to a different endpoint.
+    """
+    global _databricks_async_fetcher
+    if _databricks_async_fetcher is None:
+        _databricks_async_fetcher = AsyncDatabricksAPIFetcher(attempt_context=lambda: _LLM_SEM)
+    return _databricks_async_fetcher
+
+
+def get_batch_dispatcher() -> AsyncBatchDispatcher:
+    """
+    Returns the process-wide Batch API dispatcher, creating it on first use.
+
+    It shares the OpenAI fetcher's client for file uploads and batch polling.
+    """
+    global _batch_dispatcher
+    if _batch_dispatcher is None:
+        _batch_dispatcher = AsyncBatchDispatcher(get_openai_fetcher().client)
+    return _batch_dispatcher
+
+
+def get_response_cache() -> GenerativeCache:
+    """
+    Returns the process-wide response cache, opening it on first use.
+
+    It is backed by SQLite when `LLM_CACHE_PATH` is set and memory-only otherwise.
+    """
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = GenerativeCache(LLM_CACHE_PATH or None, max_memory_entries=LLM_CACHE_MEMORY_ENTRIES)
+    return _response_cache
+
+
+async def shutdown_fetchers() -> None:
+    """
+    Closes the shared fetchers and their connection pools.
+
+    Call once before the event loop exits; fetchers are re-created lazily if used again afterwards.
+    """
+    global _openai_async_fetcher, _databricks_async_fetcher, _batch_dispatcher, _response_cache
+    if _batch_dispatcher is not None:
+        await _batch_dispatcher.close()
+        _batch_dispatcher = None
+    if _response_cache is not None:
+        _response_cache.close()
+        _response_cache = None
+    for fetcher in (_openai_async_fetcher, _databricks_async_fetcher):
+        if fetcher is not None:
+            await fetcher.close()
+    _openai_async_fetcher = None
+    _databricks_async_fetcher = None
+
+
+@functools.lru_cache(maxsize=None)
+def _response_format_for(response_format: BaseModelType) -> Dict[str, Any]:
+    """
+    Converts a Pydantic model into an OpenAI structured-output `response_format` once per model class.
+
+    Args:
+        response_format (`Type[BaseModel]`): The Pydantic model describing the expected output.
+
+    Returns:
+        `Dict[str, Any]`: A `json_schema` response format that can be passed to `chat.completions.create`.
+    """
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": response_format.__name__,
+            "schema": to_strict_json_schema(response_format),
+            "strict": True,
+        },
+    }
+
+
+@functools.lru_cache(maxsize=64)
+def _prompt_cache_key(system_prompt: str) -> str:
+    """
+    Derives a stable OpenAI `prompt_cache_key` from a system prompt.
+
+    Requests sharing a system prompt are then routed to the same prompt-cache shard, so its prefix is
+    prefilled once instead of on every call.
+    """
+    return hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()[:32]
+
+
+@functools.lru_cache(maxsize=None)
+def _base_request_kwargs(response_format: BaseModelType) -> Dict[str, Any]:
+    """
+    Returns the static part of every OpenAI request for `response_format`, built once per model class.
+
+    It holds `DEFAULT_OPENAI_KWARGS` plus the structured-output schema; callers must copy it, never mutate it.
+    """
+    return DEFAULT_OPENAI_KWARGS | {"response_format": _response_format_for(response_format)}
+
+
+@functools.lru_cache(maxsize=None)
+def _base_request_digest(response_format: BaseModelType) -> str:
+    """Digest of `_base_request_kwargs(response_format)`, i.e. of the model parameters and the output schema."""
+    return hashlib.sha256(
+        orjson.dumps(_base_request_kwargs(response_format), default=str, option=orjson.OPT_SORT_KEYS)
+    ).hexdigest()
+
+
+def _openai_request_kwargs(
+        messages: Sequence[Dict[str, str]],
+        response_format: BaseModelType,
+        kwargs: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Merges the default, caller and structured-output parameters of an OpenAI chat completion request."""
+    request_kwargs = {**_base_request_kwargs(response_format), **kwargs, "messages": messages}
+    if messages and messages[0]["role"] == "system":
+        request_kwargs.setdefault("prompt_cache_key", _prompt_cache_key(messages[0]["content"]))
+    return request_kwargs
+
+
+def _fetch_parsed_key(
+        messages: Sequence[Dict[str, str]],
+        response_format: BaseModelType,
+        use_databricks: bool,
+        kwargs: Dict[str, Any],
+) -> str:
+    """
+    Builds an exact-match cache key for a `fetch_parsed` request.
+
+    Args:
+        messages (`Sequence[Dict[str, str]]`): The chat messages sent to the model.
+        response_format (`Type[BaseModel]`): The Pydantic model describing the expected output.
+        use_databricks (`bool`): Whether the request is routed through Databricks first.
+        kwargs (`Dict[str, Any]`): Extra completion parameters.
+
+    Returns:
+        `str`: SHA-256 hex digest of the canonicalized request.
+    """
+    # The model parameters and the output schema are part of the key so that persisted responses of another
+    # model, or of an earlier version of `response_format`, are not reused
+    payload = orjson.dumps(
+        [
+            messages, response_format.__module__, response_format.__qualname__, use_databricks, kwargs,
+            _base_request_digest(response_format), DEFAULT_DATABRICKS_KWARGS if use_databricks else None,
+        ],
+        default=str,
+        option=orjson.OPT_SORT_KEYS,
+    )
+    return hashlib.sha256(payload).hexdigest()
 
 
 async def fetch_parsed(
-        messages: List[Dict[str, str]],
+        messages: Sequence[Dict[str, str]],
         response_format: BaseModelType,
         use_databricks: bool = False,
         **kwargs
 ) -> Tuple[BaseModelType | None, Dict[str, Dict]]:
-    
+    """
+    Requests a structured completion, reusing the result of any identical earlier or in-flight request.
+
+    Concurrent callers with the same request await a single shared task, which is dropped once it finishes;
+    earlier results are served by the response cache, and failed requests are retried by a later call.
+    """
+    key = _fetch_parsed_key(messages, response_format, use_databricks, kwargs)
+    task = _fetch_parsed_tasks.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_fetch_parsed_stored(key, messages, response_format, use_databricks, **kwargs))
+        _fetch_parsed_tasks[key] = task
+
+        def evict_when_done(done: asyncio.Task) -> None:
+            if _fetch_parsed_tasks.get(key) is done:
+                del _fetch_parsed_tasks[key]
+
+        task.add_done_callback(evict_when_done)
+
+    # Shield so that one cancelled caller does not cancel the request for the others
+    return await asyncio.shield(task)
+
+
+async def fetch_parsed_many(
+        requests: Sequence[Tuple[Callable[..., Sequence[Dict[str, str]]], Dict[str, Any]]],
+        response_format: BaseModelType,
+        use_databricks: bool = False,
+        **kwargs
+) -> List[Tuple[BaseModelType | None, Dict[str, Dict]] | BaseException]:
+    """
+    Builds and sends several independent structured requests concurrently.
+
+    Concurrency is bounded by the shared `_LLM_SEM` and transient errors are retried by the fetcher, so
+    callers can hand over any number of requests at once. A failed request does not cancel the others.
+
+    Args:
+        requests (`Sequence[Tuple[Callable, Dict[str, Any]]]`): Pairs of a message builder (e.g.
+            `get_8k_extraction_message`) and the keyword arguments to build its messages with.
+        response_format (`Type[BaseModel]`): The Pydantic model describing the expected output of every request.
+        use_databricks (`bool`): Whether the requests are routed through Databricks first.
+
+    Returns:
+        `List[Tuple[BaseModel, Dict] | BaseException]`: For each request, in order, the `fetch_parsed` result
+        or the exception it raised.
+    """
+    return await asyncio.gather(
+        *[
+            fetch_parsed(build_messages(**build_kwargs), response_format, use_databricks, **kwargs)
+            for build_messages, build_kwargs in requests
+        ],
+        return_exceptions=True,
+    )
+
+
+def write_batch_input(
+        path: str,
+        requests: Iterable[Tuple[str, Sequence[Dict[str, str]]]],
+        response_format: BaseModelType,
+        **kwargs
+) -> int:
+    """
+    Writes a Batch API input file for offline backfills, one structured request per line.
+
+    Each body carries the same model, schema and prompt-cache parameters as a live `fetch_parsed` request,
+    so the file can be uploaded with `purpose="batch"` and the output parsed with `response_format`.
+
+    Args:
+        path (`str`): Destination JSONL file.
+        requests (`Iterable[Tuple[str, Sequence[Dict[str, str]]]]`): Pairs of custom id and chat messages, e.g.
+            from `get_8k_extraction_message`; consumed lazily.
+        response_format (`Type[BaseModel]`): The Pydantic model describing the expected output.
+
+    Returns:
+        `int`: Number of requests written.
+    """
+    def bodies():
+        for custom_id, messages in requests:
+            body = _openai_request_kwargs(messages, response_format, kwargs)
+            body.pop("timeout", None)  # client-side option, not part of the request body
+            yield custom_id, body
+
+    return write_batch_requests(path, bodies())
+
+
+async def _fetch_parsed_stored(
+        key: str,
+        messages: Sequence[Dict[str, str]],
+        response_format: BaseModelType,
+        use_databricks: bool = False,
+        **kwargs
+) -> Tuple[BaseModelType | None, Dict[str, Dict]]:
+    """
+    Serves a `fetch_parsed` request from the response cache, storing the response on a miss.
+
+    Cache hits report empty usage since no tokens were billed.
+    """
+    response_cache = get_response_cache()
+    # Only the SQLite-backed cache blocks; a memory-only cache is read and written inline
+    run = asyncio.to_thread if response_cache.path else _run_inline
+
+    stored = await run(response_cache.get, key)
+    if stored is not None:
+        return response_format.model_validate_json(stored), {}
+
+    extracted_output, usage = await _fetch_parsed_uncached(messages, response_format, use_databricks, **kwargs)
+    await run(response_cache.set, key, extracted_output.model_dump_json().encode("utf-8"))
+    return extracted_output, usage
+
+
+async def _run_inline(func: Callable[..., Any], *args) -> Any:
+    """Awaitable counterpart of `asyncio.to_thread` that calls `func` on the event loop."""
+    return func(*args)
+
+
+async def _fetch_parsed_uncached(
+        messages: Sequence[Dict[str, str]],
+        response_format: BaseModelType,
+        use_databricks: bool = False,
+        **kwargs
+) -> Tuple[BaseModelType | None, Dict[str, Dict]]:
+
+    if USE_BATCH_API and not use_databricks:
+        # Batch jobs can take hours, so they do not hold an `_LLM_SEM` slot while waiting
+        body = _openai_request_kwargs(messages, response_format, kwargs)
+        body.pop("timeout", None)  # client-side option, not part of the request body
+        openai_chat_completion = await get_batch_dispatcher().submit(body)
+        extracted_output = response_format.model_validate_json(openai_chat_completion.choices[0].message.content)
+        return extracted_output, {"openai": openai_chat_completion.usage.model_dump()}
+
+    # The fetchers take an `_LLM_SEM` slot (and a rate-limit token) per attempt, so retries are throttled too
+    # and retry backoff does not hold a slot
     if use_databricks:
         db_kwargs = DEFAULT_DATABRICKS_KWARGS | {**kwargs,"messages": messages}
-    
-        databricks_chat_completion = await databricks_async_fetcher.fetch_parsed_completion(**db_kwargs)
+
+        databricks_chat_completion = await get_databricks_fetcher().fetch_parsed_completion(**db_kwargs)
         db_output = databricks_chat_completion.choices[0].message.content
         messages =[
                 {
@@ -52,67 +414,127 @@ async def fetch_parsed(
                 }
             ]
 
-    kwargs = DEFAULT_OPENAI_KWARGS | {**kwargs, "messages": messages, "response_format": response_format}
-    openai_parsed_completion = await openai_async_fetcher.fetch_parsed_completion(**kwargs)
-    extracted_output = openai_parsed_completion.choices[0].message.parsed
-    usage = {"openai": openai_parsed_completion.usage.model_dump()}
+    kwargs = _openai_request_kwargs(messages, response_format, kwargs)
+    openai_chat_completion = await get_openai_fetcher().fetch_chat_completion(**kwargs)
+    extracted_output = response_format.model_validate_json(openai_chat_completion.choices[0].message.content)
+    usage = {"openai": openai_chat_completion.usage.model_dump()}
 
     return extracted_output, usage
 
 
+def _pack_lines(lines: List[str], max_lines: int, max_chars: int) -> List[List[str]]:
+    """
+    Greedily packs consecutive lines into batches bounded by line count and total length.
+
+    A line longer than `max_chars` on its own still gets a batch of its own.
+
+    Args:
+        lines (`List[str]`): The lines to pack.
+        max_lines (`int`): Maximum number of lines per batch.
+        max_chars (`int`): Maximum total number of characters per batch.
+
+    Returns:
+        `List[List[str]]`: The batches, in the original line order.
+    """
+    batches = []
+    batch, batch_chars = [], 0
+    for line in lines:
+        if batch and (len(batch) >= max_lines or batch_chars + len(line) > max_chars):
+            batches.append(batch)
+            batch, batch_chars = [], 0
+        batch.append(line)
+        batch_chars += len(line)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
 async def _fetch_extracted_output(
         company_name: str,
         text: str,
         quarter: str,
         doc_type: DocType,
 ) -> list[Dict[str, Dict]]:
-    lines = get_sentences(text=text)
+    # NLTK tokenization is CPU-bound; run it in a worker thread so in-flight requests keep being serviced
+    lines = await asyncio.to_thread(get_sentences, text)
 
-    async def fetch_line(line: str):
+    # company_name and quarter are substituted once for every line of this text
+    if doc_type == DocType.FILING_8K:
+        build_line_messages = make_8k_extraction_message(company_name=company_name, quarter=quarter)
+    elif doc_type == DocType.EARNINGS_CALL:
+        build_line_messages = make_earnings_extraction_message(company_name=company_name, quarter=quarter)
+    else:
+        raise NotImplementedError
+
+    async def fetch_line(line: str) -> ExtractedOutput:
+        messages = build_line_messages(line)
+
+        try:
+            extracted_output, _ = await fetch_parsed(
+                messages=messages, response_format=ExtractedOutput
+            )
+
+            return extracted_output
+
+        except Exception as e:
+            logger.warning("An Error occurred while processing extracting quote: %s, %s", line, e, exc_info=True)
+            return ExtractedOutput(titles=[], values=[], units=[])
+
+    async def fetch_batch(batch: List[str]) -> List[ExtractedOutput]:
+        if len(batch) == 1:
+            return [await fetch_line(batch[0])]
 
         if doc_type == DocType.FILING_8K:
-            messages = get_8k_extraction_message(
+            messages = get_8k_batch_extraction_message(
                 company_name=company_name,
                 quarter=quarter,
-                line=line
+                lines=batch
             )
         elif doc_type == DocType.EARNINGS_CALL:
-            messages = get_earnings_extraction_message(
+            messages = get_earnings_batch_extraction_message(
                 company_name=company_name,
                 quarter=quarter,
-                line=line
+                lines=batch
             )
         else:
             raise NotImplementedError
 
         try:
-            extracted_output, _ = await fetch_parsed(
-                messages=messages, response_format=ExtractedOutput
+            batched_output, _ = await fetch_parsed(
+                messages=messages, response_format=BatchedExtractedOutput
             )
+            if len(batched_output.items) == len(batch):
+                return batched_output.items
 
-            return extracted_output.model_dump()
+            logger.warning("Batch extraction returned %s items for %s lines", len(batched_output.items), len(batch))
 
         except Exception as e:
-            print(f"An Error occurred while processing extracting quote: {line}, {e}")
-            traceback.print_exc()
-            return {"kpis": [], "values": [], "units": []}
+            logger.warning(
+                "An Error occurred while processing extracting batch of %s lines, %s", len(batch), e, exc_info=True
+            )
 
-    results = await tqdm_asyncio.gather(*[fetch_line(line) for line in lines])
+        # Fall back to one request per line so a bad batch does not drop all of its lines
+        return await asyncio.gather(*[fetch_line(line) for line in batch])
 
-    final_result = []
+    # Only distinct lines that may hold a value are sent to the LLM
+    pending = [line for line in dict.fromkeys(lines) if has_digit(line) or not SKIP_LINES_WITHOUT_DIGITS]
+    batches = _pack_lines(pending, EXTRACTION_BATCH_SIZE, EXTRACTION_BATCH_MAX_CHARS)
+    batch_outputs = await tqdm_asyncio.gather(*[fetch_batch(batch) for batch in batches])
+    output_by_line = dict(zip(chain.from_iterable(batches), chain.from_iterable(batch_outputs)))
 
-    for result, line in zip(results, lines):
-        for title, value, unit in zip(result['titles'], result['values'], result['units']):
-            final_result.append(
-                {
-                    'title': title,
-                    'value': value,
-                    'unit': unit,
-                    'reference': line
-                }
-            )
+    empty_output = ExtractedOutput(titles=[], values=[], units=[])
+    results = [output_by_line.get(line, empty_output) for line in lines]
 
-    return final_result
+    return [
+        {
+            'title': title,
+            'value': value,
+            'unit': unit,
+            'reference': line
+        }
+        for result, line in zip(results, lines)
+        for title, value, unit in zip(result.titles, result.values, result.units)
+    ]
 
 
 async def _fetch_classification_output(
@@ -121,10 +543,8 @@ async def _fetch_classification_output(
         line_data: Dict,
         quarter: str,
         doc_type: DocType,
-) -> Dict[str, str]:
-    line_str = f"Title: {line_data.get('title', 'N/A')}, Value: {line_data.get('value', 'N/A')}, Unit: {line_data.get('unit', 'N/A')}"
-    if 'reference' in line_data:
-        line_str += f" (from sentence: {line_data['reference']})"
+) -> ClassificationOutput:
+    line_str = _classification_line(line_data)
 
     if doc_type == DocType.FILING_8K:
         messages = get_8k_classification_message(
@@ -147,12 +567,151 @@ async def _fetch_classification_output(
         classification_output, _ = await fetch_parsed(
             messages=messages, response_format=ClassificationOutput
         )
-        return classification_output.model_dump()
+        return classification_output
 
     except Exception as e:
-        print(f"An Error occurred while processing auditing quote: {line_str}, {e}")
-        traceback.print_exc()
-        return {"title": "None", "type_": "None", "period": "None", "unit": "None", "category": "None"}
+        logger.warning("An Error occurred while processing auditing quote: %s, %s", line_str, e, exc_info=True)
+        return ClassificationOutput(title="None", type_="None", period="None", unit="None", category="None")
+
+
+def _classification_line(line_data: Dict) -> str:
+    title, value, unit = (line_data.get(key, 'N/A') for key in ('title', 'value', 'unit'))
+    if 'reference' in line_data:
+        return f"Title: {title}, Value: {value}, Unit: {unit} (from sentence: {line_data['reference']})"
+    return f"Title: {title}, Value: {value}, Unit: {unit}"
+
+
+async def _fetch_batch_classification_output(
+        company_name: str,
+        chunk: str,
+        line_data_list: List[Dict],
+        quarter: str,
+        doc_type: DocType,
+) -> List[ClassificationOutput]:
+    """
+    Classifies several extracted metrics from the same `chunk`, sending up to `CLASSIFICATION_BATCH_SIZE` of them
+    as a numbered list per request instead of one request each.
+    A batch whose response does not have exactly one item per line falls back to `_fetch_classification_output`.
+
+    Args:
+        line_data_list (List[Dict]): Metrics from `_fetch_extracted_output` for this chunk
+
+    Returns:
+        List[ClassificationOutput]: One classification per input metric, in order
+    """
+    line_strs = [_classification_line(line_data) for line_data in line_data_list]
+
+    async def fetch_batch(start: int) -> List[ClassificationOutput]:
+        batch = line_data_list[start:start + CLASSIFICATION_BATCH_SIZE]
+        batch_strs = line_strs[start:start + CLASSIFICATION_BATCH_SIZE]
+        if len(batch) == 1:
+            return [await _fetch_classification_output(company_name, chunk, batch[0], quarter, doc_type)]
+
+        if doc_type == DocType.FILING_8K:
+            messages = get_8k_batch_classification_message(
+                company_name=company_name,
+                quarter=quarter,
+                chunk=chunk,
+                lines=batch_strs,
+            )
+        elif doc_type == DocType.EARNINGS_CALL:
+            messages = get_earnings_batch_classification_message(
+                company_name=company_name,
+                quarter=quarter,
+                chunk=chunk,
+                lines=batch_strs,
+            )
+        else:
+            raise NotImplementedError
+
+        try:
+            batched_output, _ = await fetch_parsed(
+                messages=messages, response_format=BatchedClassificationOutput
+            )
+            if len(batched_output.items) == len(batch):
+                return batched_output.items
+
+            logger.warning("Batch classification returned %s items for %s lines", len(batched_output.items), len(batch))
+
+        except Exception as e:
+            logger.warning(
+                "An Error occurred while processing auditing batch of %s lines, %s", len(batch), e, exc_info=True
+            )
+
+        # Fall back to one request per line so a bad batch does not drop all of its lines
+        return await asyncio.gather(
+            *[_fetch_classification_output(company_name, chunk, line_data, quarter, doc_type) for line_data in batch]
+        )
+
+    results = await asyncio.gather(
+        *[fetch_batch(start) for start in range(0, len(line_data_list), CLASSIFICATION_BATCH_SIZE)]
+    )
+    return [classification_output for batch_result in results for classification_output in batch_result]
+
+
+async def _fetch_extracted_classified_output(
+        company_name: str,
+        text: str,
+        quarter: str,
+        doc_type: DocType,
+) -> List[Dict[str, str]]:
+    """
+    Extracts and classifies the metrics of every sentence in one LLM call per sentence.
+
+    Equivalent to `_fetch_extracted_output` followed by `_fetch_classification_output` for each extracted
+    metric, but with a single round trip per sentence instead of one plus one per metric.
+
+    Args:
+        company_name (`str`): Name of the reporting company.
+        text (`str`): The chunk to extract from; it is also passed to the model as context.
+        quarter (`str`): Reporting quarter, e.g. "2024 Q3".
+        doc_type (`DocType`): Type of the source document. Only `DocType.FILING_8K` is supported.
+
+    Returns:
+        `List[Dict[str, str]]`: One dictionary per metric with title, value, unit, type_, period, category
+        and the source sentence as reference.
+    """
+    if doc_type != DocType.FILING_8K:
+        raise NotImplementedError
+
+    # NLTK tokenization is CPU-bound; run it in a worker thread so in-flight requests keep being serviced
+    lines = await asyncio.to_thread(get_sentences, text)
+
+    async def fetch_line(line: str) -> List[Dict[str, str]]:
+        messages = get_8k_extraction_classification_message(
+            company_name=company_name,
+            quarter=quarter,
+            chunk=text,
+            line=line
+        )
+        try:
+            metric_list_output, _ = await fetch_parsed(
+                messages=messages, response_format=ClassifiedMetricListOutput
+            )
+        except Exception as e:
+            logger.warning(
+                "An Error occurred while processing extracting and classifying quote: %s, %s", line, e, exc_info=True
+            )
+            return []
+
+        return [
+            {
+                "title": metric.title,
+                "value": metric.value,
+                "unit": metric.unit,
+                "type_": metric.type_,
+                "period": metric.period,
+                "category": metric.category,
+                "reference": line
+            }
+            for metric in metric_list_output.data
+        ]
+
+    if SKIP_LINES_WITHOUT_DIGITS:
+        lines = [line for line in lines if has_digit(line)]
+
+    results = await tqdm_asyncio.gather(*[fetch_line(line) for line in lines])
+    return [metric for result in results for metric in result]
 
 
 async def _fetch_table_data_row_wise_output(
@@ -178,22 +737,22 @@ async def _fetch_table_data_row_wise_output(
             messages=messages, response_format=MetricListOutput, top_p=0.1, timeout=100
         )
         result = []
-        for metric in table_output.model_dump()["data"]:
-            if metric.get('title', '').strip() and metric.get('title', '').lower().strip() != 'none':
+        for metric in table_output.data:
+            title = metric.title.strip()
+            if title and title.lower() != 'none':
                 result.append(
                     {
                         "index": table_data.get('index', ''),
-                        "category": metric.get('category', '').strip(),
-                        "title": metric.get('title', '').strip(),
-                        "unit": metric.get('unit', '').strip(),
-                        "type_": metric.get('type_', '').strip(),
-                        "reference": table_data.get('reference', '')
+                        "category": metric.category.strip(),
+                        "title": title,
+                        "unit": metric.unit.strip(),
+                        "type_": metric.type_.strip(),
+                        "reference": raw_table_data
                     }
                 )
         return result
     except Exception as e:
-        print(f"An Error occurred while processing table data rowwise: {e}")
-        traceback.print_exc()
+        logger.warning("An Error occurred while processing table data rowwise: %s", e, exc_info=True)
         return []
 
 
@@ -234,28 +793,93 @@ async def _fetch_table_data_cell_wise_output(
         table_output, _ = await fetch_parsed(
             messages=messages, response_format=CellListOutput, top_p=0.1
         )
-        result = []
-
-        # Process each cell value and period extracted for this specific metric
-        for cell in table_output.model_dump()["data"]:
-            added_cell = set()
-            if cell.get('value', '').strip() and cell.get('value', '').lower().strip() != 'none' and (
-                    cell.get('value', ''), cell.get('period', '')) not in added_cell:
-                result.append(
-                    {
-                        "index": metric_data.get('index', ''),
-                        "category": metric_category,
-                        "title": metric_title,
-                        "value": cell.get('value', '').strip(),
-                        "unit": metric_unit,
-                        "type_": metric_type,
-                        "period": cell.get('period', '').strip(),
-                        "reference": raw_table_data
-                    }
-                )
-                added_cell.add((cell.get('value', ''), cell.get('period', '')))
-        return result
+        return _cell_records(metric_data, table_output.data)
     except Exception as e:
-        print(f"An Error occurred while processing table data cellwise: {e}")
-        traceback.print_exc()
+        logger.warning("An Error occurred while processing table data cellwise: %s", e, exc_info=True)
         return []
+
+
+def _cell_records(metric_data: Dict, cells: List[CellOutput]) -> List[Dict]:
+    """
+    Builds the output records of one metric from its extracted cells.
+
+    Cells without a value and repeated (value, period) pairs are skipped.
+
+    Args:
+        metric_data (Dict): Dictionary containing information about a single metric
+                           (includes title, unit, type_, category, reference)
+        cells (List[CellOutput]): Cells extracted for the metric
+
+    Returns:
+        List[Dict]: List of dictionaries containing extracted values and periods for the metric
+    """
+    result = []
+    added_cell = set()
+    for cell in cells:
+        value, period = cell.value.strip(), cell.period.strip()
+        if value and value.lower() != 'none' and (value, period) not in added_cell:
+            result.append(
+                {
+                    "index": metric_data.get('index', ''),
+                    "category": metric_data.get('category', ''),
+                    "title": metric_data.get('title', ''),
+                    "value": value,
+                    "unit": metric_data.get('unit', ''),
+                    "type_": metric_data.get('type_', ''),
+                    "period": period,
+                    "reference": metric_data.get('reference', '')
+                }
+            )
+            added_cell.add((value, period))
+    return result
+
+
+async def _fetch_table_data_multi_cell_wise_output(
+        metrics: List[Dict],
+        company_name: str,
+        quarter: str,
+) -> List[List[Dict]]:
+    """
+    Extracts cell values and periods for several metrics of the same table.
+    Metrics are sent `CELL_WISE_BATCH_SIZE` at a time, so the table is sent once per batch instead of once per metric.
+    Metrics missing from a response, or from a failed batch, fall back to `_fetch_table_data_cell_wise_output`.
+
+    Args:
+        metrics (List[Dict]): Metrics from `_fetch_table_data_row_wise_output`, all sharing the same reference table
+
+    Returns:
+        List[List[Dict]]: For each input metric, in order, the dictionaries of its extracted values and periods
+    """
+
+    async def fetch_batch(batch: List[Dict]) -> List[List[Dict]]:
+        if len(batch) == 1:
+            return [await _fetch_table_data_cell_wise_output(batch[0], company_name, quarter)]
+
+        cells_by_index = {}
+        try:
+            messages = get_table_multi_cell_wise_messages(
+                company_name=company_name,
+                table_data=batch[0].get('reference', ''),
+                quarter=quarter,
+                metrics=batch
+            )
+            table_output, _ = await fetch_parsed(
+                messages=messages, response_format=MultiMetricCellListOutput, top_p=0.1
+            )
+            cells_by_index = {metric_output.metric_index: metric_output.data for metric_output in table_output.results}
+        except Exception as e:
+            logger.warning(
+                "An Error occurred while processing table data cellwise for %s metrics: %s",
+                len(batch), e, exc_info=True
+            )
+
+        async def resolve(metric_index: int, metric_data: Dict) -> List[Dict]:
+            if metric_index in cells_by_index:
+                return _cell_records(metric_data, cells_by_index[metric_index])
+            return await _fetch_table_data_cell_wise_output(metric_data, company_name, quarter)
+
+        return await asyncio.gather(*[resolve(idx, metric) for idx, metric in enumerate(batch, 1)])
+
+    batches = [metrics[i:i + CELL_WISE_BATCH_SIZE] for i in range(0, len(metrics), CELL_WISE_BATCH_SIZE)]
+    results = await asyncio.gather(*[fetch_batch(batch) for batch in batches])
+    return [metric_result for batch_result in results for metric_result in batch_result]
@@ -1,7 +1,7 @@
 from enum import Enum
 from typing import List
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class DocType(Enum):
@@ -12,17 +12,26 @@ class DocType(Enum):
     FILING_10Q = "filing_10q"
 
 
-class QuarterOutput(BaseModel):
+class _FrozenOutput(BaseModel):
+    """Base for LLM output models; instances are cached and shared between callers, so they are immutable."""
+    model_config = ConfigDict(frozen=True)
+
+
+class QuarterOutput(_FrozenOutput):
     quarter: str
 
 
-class ExtractedOutput(BaseModel):
+class ExtractedOutput(_FrozenOutput):
     titles: List[str]
     values: List[str]
     units: List[str]
 
 
-class ClassificationOutput(BaseModel):
+class BatchedExtractedOutput(_FrozenOutput):
+    items: List[ExtractedOutput]
+
+
+class ClassificationOutput(_FrozenOutput):
     type_: str
     period: str
     unit: str
@@ -30,27 +39,53 @@ class ClassificationOutput(BaseModel):
     title: str
 
 
-class MetricOutput(BaseModel):
+class BatchedClassificationOutput(_FrozenOutput):
+    items: List[ClassificationOutput]
+
+
+class ClassifiedMetricOutput(_FrozenOutput):
     title: str
+    value: str
     unit: str
     type_: str
+    period: str
     category: str
 
 
-class MetricListOutput(BaseModel):
+class ClassifiedMetricListOutput(_FrozenOutput):
+    data: List[ClassifiedMetricOutput]
+
+
+class MetricOutput(_FrozenOutput):
+    title: str
+    unit: str
+    type_: str
+    category: str
+
+
+class MetricListOutput(_FrozenOutput):
     data: List[MetricOutput]
 
 
-class CellOutput(BaseModel):
+class CellOutput(_FrozenOutput):
     value: str
     period: str
 
 
-class CellListOutput(BaseModel):
+class CellListOutput(_FrozenOutput):
     data: List[CellOutput]
 
 
-class TableCellOutput(BaseModel):
+class MetricCellListOutput(_FrozenOutput):
+    metric_index: int
+    data: List[CellOutput]
+
+
+class MultiMetricCellListOutput(_FrozenOutput):
+    results: List[MetricCellListOutput]
+
+
+class TableCellOutput(_FrozenOutput):
     title: str
     value: str
     unit: str
@@ -59,5 +94,5 @@ class TableCellOutput(BaseModel):
     category: str
 
 
-class TableDataOutput(BaseModel):
+class TableDataOutput(_FrozenOutput):
     data: List[TableCellOutput]
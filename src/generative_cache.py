@@ -0,0 +1,87 @@
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+__all__ = [
+    "GenerativeCache",
+]
+
+
+class GenerativeCache:
+    """
+    Exact-match store for LLM responses, keyed by a digest of the full request.
+
+    The most recently used entries are kept in a bounded in-memory LRU and, when `path` is given, every entry
+    is stored in a SQLite table so that re-runs over the same filings skip the LLM call entirely. SQLite reads
+    and writes are blocking; call them through `asyncio.to_thread` from async code.
+
+    Args:
+        path (`Optional[str]`): SQLite file backing the cache, or `None` for a memory-only cache.
+        max_memory_entries (`int`): Number of entries kept in memory; the least recently used are evicted.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_memory_entries: int = 4096):
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value BLOB NOT NULL)")
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Returns the stored response for `key`, or `None` on a miss.
+
+        Args:
+            key (`str`): Digest of the request.
+
+        Returns:
+            `Optional[bytes]`: The serialized response.
+        """
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                return value
+            if self._conn is None:
+                return None
+
+            row = self._conn.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._remember(key, row[0])
+            return row[0]
+
+    def set(self, key: str, value: bytes) -> None:
+        """
+        Stores the serialized response for `key`, replacing any previous entry.
+
+        Args:
+            key (`str`): Digest of the request.
+            value (`bytes`): The serialized response.
+        """
+        with self._lock:
+            self._remember(key, value)
+            if self._conn is not None:
+                self._conn.execute("INSERT OR REPLACE INTO responses (key, value) VALUES (?, ?)", (key, value))
+                self._conn.commit()
+
+    def close(self) -> None:
+        """Closes the SQLite connection; the in-memory entries stay readable."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _remember(self, key: str, value: bytes) -> None:
+        # Caller holds `_lock`
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
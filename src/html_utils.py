@@ -2,10 +2,12 @@ import re
 
 from bs4 import BeautifulSoup, Tag
 
+_HR_RE = re.compile(r'(?i)<hr\b[^>]*>')
+
 
 def split_by_hr_blocks(html: str):
-    parts = re.split(r'(?i)<hr\b[^>]*>', html)
-    return [p.strip() for p in parts if p.strip()]
+    parts = (p.strip() for p in _HR_RE.split(html))
+    return [p for p in parts if p]
 
 
 def get_text_from_html(html: str):
@@ -1,15 +1,41 @@
-from .message_8k import get_8k_classification_message, get_8k_extraction_message
+from .message_8k import (
+    get_8k_batch_classification_message,
+    get_8k_batch_extraction_message,
+    get_8k_classification_max_input_tokens,
+    get_8k_classification_message,
+    get_8k_extraction_classification_message,
+    get_8k_extraction_message,
+    make_8k_extraction_message,
+)
 from .message_earnings import (
+    get_earnings_batch_classification_message,
+    get_earnings_batch_extraction_message,
     get_earnings_classification_message,
     get_earnings_extraction_message,
+    make_earnings_extraction_message,
+)
+from .message_table import (
+    get_table_cell_wise_max_input_tokens,
+    get_table_cell_wise_messages,
+    get_table_multi_cell_wise_messages,
+    get_table_row_wise_messages,
 )
-from .message_table import get_table_cell_wise_messages, get_table_row_wise_messages
 
 __all__ = [
     "get_table_cell_wise_messages",
+    "get_table_cell_wise_max_input_tokens",
+    "get_table_multi_cell_wise_messages",
     "get_table_row_wise_messages",
     "get_earnings_extraction_message",
+    "get_earnings_batch_extraction_message",
     "get_8k_classification_message",
+    "get_8k_classification_max_input_tokens",
     "get_8k_extraction_message",
-    "get_earnings_classification_message"
+    "get_8k_batch_extraction_message",
+    "get_8k_batch_classification_message",
+    "get_8k_extraction_classification_message",
+    "get_earnings_classification_message",
+    "get_earnings_batch_classification_message",
+    "make_8k_extraction_message",
+    "make_earnings_extraction_message"
 ]
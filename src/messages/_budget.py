@@ -0,0 +1,81 @@
+import functools
+import importlib.util
+import math
+from typing import Dict
+
+from ._template import PromptTemplate
+
+# Context window and completion cap of the default model (see `DEFAULT_OPENAI_KWARGS`)
+DEFAULT_CONTEXT_WINDOW = 1_047_576
+DEFAULT_MAX_COMPLETION_TOKENS = 32_768
+
+# Rough characters per token, used when tiktoken is not installed
+_CHARS_PER_TOKEN = 4
+
+_HAS_TIKTOKEN = importlib.util.find_spec("tiktoken") is not None
+
+
+@functools.lru_cache(maxsize=1)
+def _encoding():
+    """Returns the tiktoken encoding of the GPT-4.1 family, or `None` when it cannot be loaded."""
+    if not _HAS_TIKTOKEN:
+        return None
+    import tiktoken
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # The BPE file is downloaded on first use and may be unreachable
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Counts the tokens of `text` with tiktoken, or estimates them from its length when tiktoken is unavailable.
+
+    Args:
+        text (`str`): The text to measure.
+
+    Returns:
+        `int`: The (estimated) number of tokens.
+    """
+    encoding = _encoding()
+    if encoding is None:
+        return math.ceil(len(text) / _CHARS_PER_TOKEN)
+    return len(encoding.encode(text))
+
+
+@functools.lru_cache(maxsize=None)
+def prompt_overhead_tokens(system_message_content: str, user_template: PromptTemplate) -> int:
+    """
+    Returns the tokens a request spends on its fixed prompt text, i.e. with every placeholder left empty.
+
+    Args:
+        system_message_content (`str`): The system prompt.
+        user_template (`PromptTemplate`): The user prompt template.
+
+    Returns:
+        `int`: Tokens of the system prompt plus the user template's literal text.
+    """
+    return count_tokens(system_message_content) + count_tokens(user_template.literal_text)
+
+
+def max_payload_tokens(
+        system_message: Dict[str, str],
+        user_template: PromptTemplate,
+        context_window: int = DEFAULT_CONTEXT_WINDOW,
+        max_completion_tokens: int = DEFAULT_MAX_COMPLETION_TOKENS,
+) -> int:
+    """
+    Returns how many tokens the placeholders of one request may take in total without overflowing the context.
+
+    Args:
+        system_message (`Dict[str, str]`): The system message of the request.
+        user_template (`PromptTemplate`): The user prompt template of the request.
+        context_window (`int`): Context window of the model.
+        max_completion_tokens (`int`): Tokens reserved for the completion.
+
+    Returns:
+        `int`: The token budget left for the inserted values (never negative).
+    """
+    overhead = prompt_overhead_tokens(system_message["content"], user_template)
+    return max(context_window - overhead - max_completion_tokens, 0)
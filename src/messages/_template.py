@@ -0,0 +1,101 @@
+import re
+import string
+from typing import List, Tuple
+
+_FENCE = "```"
+_INNER_SPACES_RE = re.compile(r"(?<=\S)[ \t]{2,}")
+_TRAILING_SPACES_RE = re.compile(r"[ \t]+$", re.MULTILINE)
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+
+def compact_prompt(text: str) -> str:
+    """
+    Removes whitespace that only costs tokens from a prompt.
+
+    Trailing spaces, repeated spaces inside a line and runs of blank lines are collapsed, and the prompt is
+    stripped of its surrounding newlines. Leading indentation and fenced code blocks are kept as written.
+
+    Args:
+        text (`str`): The prompt as written in the source.
+
+    Returns:
+        `str`: The compacted prompt.
+    """
+    segments = text.split(_FENCE)
+    # Even segments are prose, odd segments are the bodies of fenced blocks
+    for idx in range(0, len(segments), 2):
+        segment = _TRAILING_SPACES_RE.sub("", segments[idx])
+        segment = _INNER_SPACES_RE.sub(" ", segment)
+        segments[idx] = _BLANK_LINES_RE.sub("\n\n", segment)
+    return _FENCE.join(segments).strip("\n")
+
+
+class PromptTemplate:
+    """
+    A `str.format`-style prompt template whose placeholders are parsed once, at construction.
+
+    `PromptTemplate(template).format(**values)` returns the same string as `template.format(**values)` but
+    skips re-scanning the template for `{field}` placeholders on every call. Only plain named fields are
+    supported; conversions and format specs raise `ValueError` at construction.
+
+    Args:
+        template (`str`): The template, using `{name}` placeholders and `{{`/`}}` escapes.
+    """
+
+    __slots__ = ("template", "_head", "_fields")
+
+    def __init__(self, template: str):
+        self.template = template
+
+        head = ""
+        fields = []
+        for literal, field_name, format_spec, conversion in string.Formatter().parse(template):
+            # Each literal belongs after the previous field, or to the head before the first one
+            if fields:
+                fields[-1][1] += literal
+            else:
+                head += literal
+            if field_name is None:
+                continue
+            if not field_name.isidentifier() or format_spec or conversion:
+                raise ValueError(f"Unsupported placeholder in prompt template: {{{field_name}}}")
+            fields.append([field_name, ""])
+
+        self._head: str = head
+        self._fields: Tuple[Tuple[str, str], ...] = tuple((field_name, literal) for field_name, literal in fields)
+
+    @property
+    def literal_text(self) -> str:
+        """The template with every placeholder removed, i.e. the text sent regardless of the values."""
+        return self._head + "".join(literal for _, literal in self._fields)
+
+    def partial(self, **values) -> "PromptTemplate":
+        """
+        Returns a template with the given fields already substituted, leaving the others as placeholders.
+
+        Substituted values are not re-parsed, so braces inside them are kept literally.
+        """
+        head = self._head
+        fields: List[List[str]] = []
+        for field_name, literal in self._fields:
+            if field_name in values:
+                substituted = format(values[field_name]) + literal
+                if fields:
+                    fields[-1][1] += substituted
+                else:
+                    head += substituted
+            else:
+                fields.append([field_name, literal])
+
+        template = object.__new__(PromptTemplate)
+        template.template = self.template
+        template._head = head
+        template._fields = tuple((field_name, literal) for field_name, literal in fields)
+        return template
+
+    def format(self, **values) -> str:
+        pieces = [self._head]
+        for field_name, literal in self._fields:
+            pieces.append(format(values[field_name]))
+            pieces.append(literal)
+        return "".join(pieces)
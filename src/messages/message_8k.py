@@ -1,4 +1,7 @@
-from typing import Dict, List
+from typing import Callable, Dict, List, Tuple
+
+from ._budget import DEFAULT_CONTEXT_WINDOW, DEFAULT_MAX_COMPLETION_TOKENS, max_payload_tokens
+from ._template import PromptTemplate, compact_prompt
 
 FILE_8K_METRICS_EXTRACTION_SYSTEM = """
 <task>
@@ -31,27 +34,14 @@ If the line does not contain extractable metric information, return empty lists.
 </guideline>
 
 <format>
-Return your output in the following JSON format:
-```json
-{{
-    "titles": ["Metric 1", "Metric 2", ...],
-    "values": [Value 1, Value 2, ...],
-    "units": ["Unit 1", "Unit 2", ...]
-}}
-```
-
-If no KPIs or values are present:
-
-```json
-{{
-    "titles": [],
-    "values": [],
-    "units": []
-}}
-```
+Fill `titles`, `values` and `units` of the response schema as parallel lists: the i-th entry of each describes the i-th metric.
 </format>
 """
 
+FILE_8K_METRICS_EXTRACTION_SYSTEM_MESSAGE = {
+    "role": "system", "content": compact_prompt(FILE_8K_METRICS_EXTRACTION_SYSTEM)
+}
+
 FILE_8K_METRICS_EXTRACTION_USER = """
 Extract a key business performance metric, such as KPI, Financials, Guidance.
 In other words, extract a metric that reflects corporate results.
@@ -62,34 +52,87 @@ In other words, extract a metric that reflects corporate results.
 
 <year_and_quarter>
 {quarter}
-</year_and_quarter>>
+</year_and_quarter>
 
 <line>
 {line}
 </line>
 """
 
+FILE_8K_METRICS_EXTRACTION_USER_TEMPLATE = PromptTemplate(FILE_8K_METRICS_EXTRACTION_USER)
+
 
 def get_8k_extraction_message(
         company_name: str,
         quarter: str,
         line: str
-) -> List[Dict[str, str]]:
-    messages = [
+) -> Tuple[Dict[str, str], Dict[str, str]]:
+    return (
+        FILE_8K_METRICS_EXTRACTION_SYSTEM_MESSAGE,
         {
-            "role": "system",
-            "content": FILE_8K_METRICS_EXTRACTION_SYSTEM
+            "role": "user",
+            "content": FILE_8K_METRICS_EXTRACTION_USER_TEMPLATE.format(
+                company_name=company_name,
+                quarter=quarter,
+                line=line
+            )
         },
+    )
+
+
+def make_8k_extraction_message(
+        company_name: str,
+        quarter: str
+) -> Callable[[str], Tuple[Dict[str, str], Dict[str, str]]]:
+    """
+    Binds `company_name` and `quarter` once and returns a `line -> messages` builder
+    equivalent to `get_8k_extraction_message`.
+    """
+    template = FILE_8K_METRICS_EXTRACTION_USER_TEMPLATE.partial(company_name=company_name, quarter=quarter)
+
+    def build(line: str) -> Tuple[Dict[str, str], Dict[str, str]]:
+        return FILE_8K_METRICS_EXTRACTION_SYSTEM_MESSAGE, {"role": "user", "content": template.format(line=line)}
+
+    return build
+
+
+FILE_8K_METRICS_BATCH_EXTRACTION_USER = """
+Extract a key business performance metric, such as KPI, Financials, Guidance, from each of the numbered lines below.
+Treat every line independently. Return the `items` list with exactly one entry per line, in the same order as the lines.
+Each entry follows the output format above; use empty lists for a line without any metric.
+
+<company>
+{company_name}
+</company>
+
+<year_and_quarter>
+{quarter}
+</year_and_quarter>
+
+<lines>
+{lines}
+</lines>
+"""
+
+FILE_8K_METRICS_BATCH_EXTRACTION_USER_TEMPLATE = PromptTemplate(FILE_8K_METRICS_BATCH_EXTRACTION_USER)
+
+
+def get_8k_batch_extraction_message(
+        company_name: str,
+        quarter: str,
+        lines: List[str]
+) -> Tuple[Dict[str, str], Dict[str, str]]:
+    return (
+        FILE_8K_METRICS_EXTRACTION_SYSTEM_MESSAGE,
         {
             "role": "user",
-            "content": FILE_8K_METRICS_EXTRACTION_USER.format(
+            "content": FILE_8K_METRICS_BATCH_EXTRACTION_USER_TEMPLATE.format(
                 company_name=company_name,
                 quarter=quarter,
-                line=line
+                lines="\n".join(f"{idx}. {line}" for idx, line in enumerate(lines, 1))
             )
         },
-    ]
-    return messages
+    )
 
 
 FILE_8K_METRICS_CLASSIFICATION_SYSTEM = """
@@ -132,17 +175,21 @@ You are provided with additional context ("chunk") from the same 8-K document to
 <format>
 Return your output in the following JSON format:
 ```json
-{{
+{
     "title": "string" # copy the title of the line
     "type_": "actual" | "expected" | "None",
     "period": "YYYY QN" | "YYYY Full Year" | "(Expected) YYYY QN" | "(Expected) YYYY Full Year" | "None",
     "unit": "string" | "None",
     "category": "Financials" | "KPI" | "Guidance" | "Unclear"
-}}
+}
 ```
 </format>
 """
 
+FILE_8K_METRICS_CLASSIFICATION_SYSTEM_MESSAGE = {
+    "role": "system", "content": compact_prompt(FILE_8K_METRICS_CLASSIFICATION_SYSTEM)
+}
+
 FILE_8K_METRICS_CLASSIFICATION_USER = """
 Please review the following line in the context of the surrounding chunk and the reporting period.
 Your task is to determine:
@@ -168,26 +215,193 @@ Your task is to determine:
 </line>
 """
 
+FILE_8K_METRICS_CLASSIFICATION_USER_TEMPLATE = PromptTemplate(FILE_8K_METRICS_CLASSIFICATION_USER)
+
 
 def get_8k_classification_message(
         company_name: str,
         quarter: str,
         chunk: str,
         line: str
-) -> List[Dict[str, str]]:
-    messages = [
+) -> Tuple[Dict[str, str], Dict[str, str]]:
+    return (
+        FILE_8K_METRICS_CLASSIFICATION_SYSTEM_MESSAGE,
         {
-            "role": "system",
-            "content": FILE_8K_METRICS_CLASSIFICATION_SYSTEM
+            "role": "user",
+            "content": FILE_8K_METRICS_CLASSIFICATION_USER_TEMPLATE.format(
+                company_name=company_name,
+                quarter=quarter,
+                chunk=chunk,
+                line=line
+            )
         },
+    )
+
+
+def get_8k_classification_max_input_tokens(
+        context_window: int = DEFAULT_CONTEXT_WINDOW,
+        max_completion_tokens: int = DEFAULT_MAX_COMPLETION_TOKENS,
+) -> int:
+    """
+    Returns how many tokens the chunk and line of a `get_8k_classification_message` request may take together.
+    """
+    return max_payload_tokens(
+        FILE_8K_METRICS_CLASSIFICATION_SYSTEM_MESSAGE,
+        FILE_8K_METRICS_CLASSIFICATION_USER_TEMPLATE,
+        context_window,
+        max_completion_tokens,
+    )
+
+
+FILE_8K_METRICS_BATCH_CLASSIFICATION_USER = """
+Please review each of the numbered lines below in the context of the surrounding chunk and the reporting period.
+Treat every line independently. Return the `items` list with exactly one entry per line, in the same order as the lines.
+Each entry follows the output format above.
+
+<company>
+{company_name}
+</company>
+
+<reporting_quarter>
+{quarter}
+</reporting_quarter>
+
+<chunk>
+{chunk}
+</chunk>
+
+<lines>
+{lines}
+</lines>
+"""
+
+FILE_8K_METRICS_BATCH_CLASSIFICATION_USER_TEMPLATE = PromptTemplate(FILE_8K_METRICS_BATCH_CLASSIFICATION_USER)
+
+
+def get_8k_batch_classification_message(
+        company_name: str,
+        quarter: str,
+        chunk: str,
+        lines: List[str]
+) -> Tuple[Dict[str, str], Dict[str, str]]:
+    return (
+        FILE_8K_METRICS_CLASSIFICATION_SYSTEM_MESSAGE,
         {
             "role": "user",
-            "content": FILE_8K_METRICS_CLASSIFICATION_USER.format(
+            "content": FILE_8K_METRICS_BATCH_CLASSIFICATION_USER_TEMPLATE.format(
                 company_name=company_name,
                 quarter=quarter,
                 chunk=chunk,
-                line=line
+                lines="\n".join(f"{idx}. {line}" for idx, line in enumerate(lines, 1))
             )
         },
+    )
+
+
+FILE_8K_METRICS_EXTRACTION_CLASSIFICATION_SYSTEM = """
+<task>
+You are a financial analyst reviewing a sentence (referred to as "line") from an 8-K report or earnings disclosure of a publicly traded company.
+Your task is to extract every company-level performance metric mentioned in the "line" and, for each one, to:
+1. Classify it into one of the following categories: "Financials", "KPI", or "Guidance".
+2. Determine whether it refers to actual (historical) performance or expected (forward-looking) performance.
+3. Extract its value, unit and period.
+
+You are provided with additional context ("chunk") from the same 8-K document to help determine these properties.
+Only extract metrics that represent **overall corporate performance**. Exclude department-level or individual performance data unless they aggregate to company-level insight.
+</task>
+
+<definitions>
+- **Financials**:
+    - Report standardized accounting-based financial results (e.g., Revenue, Operating Income, Net Income, EPS, Cash Flow).
+    - Includes growth rates derived from financial statement items.
+    - Always refers to actual results.
+- **KPI (Key Performance Indicator)**:
+    - Non-standard or non-GAAP metrics used to track strategic or operational performance (e.g., customer retention rate, DAU/MAU, store count, ARPU, NPS).
+    - May include financial components when broken down (e.g., revenue by segment).
+    - Refers to actual historical performance.
+- **Guidance**:
+    - Forward-looking expectations or projections, whether financial or operational.
+    - Identified via language such as “expects”, “projects”, “anticipates”, “guides”, “will be”, “outlook”.
+</definitions>
+
+<criteria>
+For each metric in the "line" that has a corresponding value:
+- Write a descriptive **title** of the metric.
+- Copy the associated **numeric value** as it appears in the "line".
+- Determine the **unit** of measurement (e.g., "$", "%", "bps", "millions"). If not clearly specified or applicable, use "None".
+- Determine whether the metric is **actual** or **expected**:
+    - If it reflects past performance, use "actual".
+    - If it refers to a future projection or expectation, use "expected".
+    - If it is ambiguous or unidentifiable, use "None".
+- Determine the **period** (e.g., "2023 Q4", "(Expected) 2024 Full Year") from either the "line" or the "chunk". If unknown, use "None".
+- Classify the **category** of the metric: "Financials", "KPI", "Guidance", or "Unclear".
+
+If the line does not contain extractable metric information, return an empty list.
+</criteria>
+
+<format>
+Return your output in the following JSON format:
+```json
+{
+    "data": [
+        {
+            "title": "string",
+            "value": "string",
+            "unit": "string" | "None",
+            "type_": "actual" | "expected" | "None",
+            "period": "YYYY QN" | "YYYY Full Year" | "(Expected) YYYY QN" | "(Expected) YYYY Full Year" | "None",
+            "category": "Financials" | "KPI" | "Guidance" | "Unclear"
+        },
+        ...
     ]
-    return messages
+}
+```
+</format>
+"""
+
+FILE_8K_METRICS_EXTRACTION_CLASSIFICATION_SYSTEM_MESSAGE = {
+    "role": "system", "content": compact_prompt(FILE_8K_METRICS_EXTRACTION_CLASSIFICATION_SYSTEM)
+}
+
+FILE_8K_METRICS_EXTRACTION_CLASSIFICATION_USER = """
+Extract and classify every key business performance metric, such as KPI, Financials, Guidance, in the following line.
+Use the surrounding chunk and the reporting period to determine the type, period and unit of each metric.
+
+<company>
+{company_name}
+</company>
+
+<reporting_quarter>
+{quarter}
+</reporting_quarter>
+
+<chunk>
+{chunk}
+</chunk>
+
+<line>
+{line}
+</line>
+"""
+
+FILE_8K_METRICS_EXTRACTION_CLASSIFICATION_USER_TEMPLATE = PromptTemplate(FILE_8K_METRICS_EXTRACTION_CLASSIFICATION_USER)
+
+
+def get_8k_extraction_classification_message(
+        company_name: str,
+        quarter: str,
+        chunk: str,
+        line: str
+) -> Tuple[Dict[str, str], Dict[str, str]]:
+    return (
+        FILE_8K_METRICS_EXTRACTION_CLASSIFICATION_SYSTEM_MESSAGE,
+        {
+            "role": "user",
+            "content": FILE_8K_METRICS_EXTRACTION_CLASSIFICATION_USER_TEMPLATE.format(
+                company_name=company_name,
+                quarter=quarter,
+                chunk=chunk,
+                line=line
+            )
+        },
+    )
@@ -1,4 +1,6 @@
-from typing import Dict, List
+from typing import Callable, Dict, List, Tuple
+
+from ._template import PromptTemplate, compact_prompt
 
 FILE_EARNINGS_METRICS_EXTRACTION_SYSTEM = """
 <task>
@@ -29,27 +31,14 @@ If the line does not contain extractable metric information, return empty lists.
 </guideline>
 
 <format>
-Return your output in the following JSON format:
-```json
-{{
-    "titles": ["Described KPI 1", "Described KPI 2", ...],
-    "values": [Numeric value 1, Numeric value 2, ...],
-    "units": ["Unit 1", "Unit 2", ...]
-}}
-```
-
-If no KPIs or values are present:
-
-```json
-{{
-    "titles": [],
-    "values": [],
-    "units": []
-}}
-```
+Fill `titles`, `values` and `units` of the response schema as parallel lists: the i-th entry of each describes the i-th metric.
 </format>
 """
 
+FILE_EARNINGS_METRICS_EXTRACTION_SYSTEM_MESSAGE = {
+    "role": "system", "content": compact_prompt(FILE_EARNINGS_METRICS_EXTRACTION_SYSTEM)
+}
+
 FILE_EARNINGS_METRICS_EXTRACTION_USER = """
 Extract `performance-related figures or comments` of following sentence.
 <company>
@@ -58,35 +47,89 @@ Extract `performance-related figures or comments` of following sentence.
 
 <year_and_quarter>
 {quarter}
-</year_and_quarter>>
+</year_and_quarter>
 
 <line>
 {line}
 </line>
 """
 
+FILE_EARNINGS_METRICS_EXTRACTION_USER_TEMPLATE = PromptTemplate(FILE_EARNINGS_METRICS_EXTRACTION_USER)
+
 
 def get_earnings_extraction_message(
         company_name: str,
         line: str,
         quarter: str
-) -> List[Dict[str, str]]:
+) -> Tuple[Dict[str, str], Dict[str, str]]:
 
-    messages = [
+    return (
+        FILE_EARNINGS_METRICS_EXTRACTION_SYSTEM_MESSAGE,
         {
-            "role": "system",
-            "content": FILE_EARNINGS_METRICS_EXTRACTION_SYSTEM
+            "role": "user",
+            "content": FILE_EARNINGS_METRICS_EXTRACTION_USER_TEMPLATE.format(
+                company_name=company_name,
+                line=line,
+                quarter=quarter
+            )
         },
+    )
+
+
+def make_earnings_extraction_message(
+        company_name: str,
+        quarter: str
+) -> Callable[[str], Tuple[Dict[str, str], Dict[str, str]]]:
+    """
+    Binds `company_name` and `quarter` once and returns a `line -> messages` builder
+    equivalent to `get_earnings_extraction_message`.
+    """
+    template = FILE_EARNINGS_METRICS_EXTRACTION_USER_TEMPLATE.partial(company_name=company_name, quarter=quarter)
+
+    def build(line: str) -> Tuple[Dict[str, str], Dict[str, str]]:
+        return FILE_EARNINGS_METRICS_EXTRACTION_SYSTEM_MESSAGE, {"role": "user", "content": template.format(line=line)}
+
+    return build
+
+
+FILE_EARNINGS_METRICS_BATCH_EXTRACTION_USER = """
+Extract `performance-related figures or comments` of each of the numbered sentences below.
+Treat every sentence independently. Return the `items` list with exactly one entry per sentence, in the same order as the sentences.
+Each entry follows the output format above; use empty lists for a sentence without any metric.
+
+<company>
+{company_name}
+</company>
+
+<year_and_quarter>
+{quarter}
+</year_and_quarter>
+
+<lines>
+{lines}
+</lines>
+"""
+
+FILE_EARNINGS_METRICS_BATCH_EXTRACTION_USER_TEMPLATE = PromptTemplate(FILE_EARNINGS_METRICS_BATCH_EXTRACTION_USER)
+
+
+def get_earnings_batch_extraction_message(
+        company_name: str,
+        lines: List[str],
+        quarter: str
+) -> Tuple[Dict[str, str], Dict[str, str]]:
+
+    return (
+        FILE_EARNINGS_METRICS_EXTRACTION_SYSTEM_MESSAGE,
         {
             "role": "user",
-            "content": FILE_EARNINGS_METRICS_EXTRACTION_USER.format(
+            "content": FILE_EARNINGS_METRICS_BATCH_EXTRACTION_USER_TEMPLATE.format(
                 company_name=company_name,
-                line=line,
+                lines="\n".join(f"{idx}. {line}" for idx, line in enumerate(lines, 1)),
                 quarter=quarter
             )
         },
-    ]
-    return messages
+    )
 
 
 FILE_EARNINGS_METRICS_CLASSIFICATION_SYSTEM = """
@@ -135,17 +178,21 @@ You may use additional context provided in the "chunk" of transcript and the "qu
 <format>
 Return your output in the following JSON format:
 ```json
-{{
+{
     "title": "string" | "None",
     "type_": "actual" | "expected" | "None",
     "period": "YYYY QN" | "YYYY Full Year" | "(Expected) YYYY QN" | "(Expected) YYYY Full Year" | "None",
     "unit": "string" | "None",
     "category": "Financials" | "KPI" | "Guidance" | "Unclear"
-}}
+}
 ```
 </format>
 """
 
+FILE_EARNINGS_METRICS_CLASSIFICATION_SYSTEM_MESSAGE = {
+    "role": "system", "content": compact_prompt(FILE_EARNINGS_METRICS_CLASSIFICATION_SYSTEM)
+}
+
 FILE_EARNINGS_METRICS_CLASSIFICATION_USER = """
 Please analyze the following line using the full context of the chunk and reporting quarter.
 Your goal is to extract a descriptive title, classify the type of performance (actual or expected), identify the applicable period and unit, and categorize the metric as "Financials", "KPI", or "Guidance".
@@ -167,29 +214,75 @@ Your goal is to extract a descriptive title, classify the type of performance (a
 </line>
 """
 
+FILE_EARNINGS_METRICS_CLASSIFICATION_USER_TEMPLATE = PromptTemplate(FILE_EARNINGS_METRICS_CLASSIFICATION_USER)
+
 
 def get_earnings_classification_message(
         company_name: str,
         chunk: str,
         line: str,
         quarter: str
-) -> List[Dict[str, str]]:
+) -> Tuple[Dict[str, str], Dict[str, str]]:
     """
     Generates messages for the LLM to audit a KPI as actual or expected and extract the period and unit.
     """
-    messages = [
+    return (
+        FILE_EARNINGS_METRICS_CLASSIFICATION_SYSTEM_MESSAGE,
         {
-            "role": "system",
-            "content": FILE_EARNINGS_METRICS_CLASSIFICATION_SYSTEM
+            "role": "user",
+            "content": FILE_EARNINGS_METRICS_CLASSIFICATION_USER_TEMPLATE.format(
+                company_name=company_name,
+                chunk=chunk,
+                line=line,
+                quarter=quarter
+            )
         },
+    )
+
+
+FILE_EARNINGS_METRICS_BATCH_CLASSIFICATION_USER = """
+Please analyze each of the numbered lines below using the full context of the chunk and reporting quarter.
+Treat every line independently. Return the `items` list with exactly one entry per line, in the same order as the lines.
+Each entry follows the output format above.
+
+<company>
+{company_name}
+</company>
+
+<reporting_quarter>
+{quarter}
+</reporting_quarter>
+
+<chunk>
+{chunk}
+</chunk>
+
+<lines>
+{lines}
+</lines>
+"""
+
+FILE_EARNINGS_METRICS_BATCH_CLASSIFICATION_USER_TEMPLATE = PromptTemplate(FILE_EARNINGS_METRICS_BATCH_CLASSIFICATION_USER)
+
+
+def get_earnings_batch_classification_message(
+        company_name: str,
+        chunk: str,
+        lines: List[str],
+        quarter: str
+) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    Generates messages for the LLM to audit several KPIs from the same chunk in one request.
+    """
+    return (
+        FILE_EARNINGS_METRICS_CLASSIFICATION_SYSTEM_MESSAGE,
         {
             "role": "user",
-            "content": FILE_EARNINGS_METRICS_CLASSIFICATION_USER.format(
+            "content": FILE_EARNINGS_METRICS_BATCH_CLASSIFICATION_USER_TEMPLATE.format(
                 company_name=company_name,
                 chunk=chunk,
-                line=line,
+                lines="\n".join(f"{idx}. {line}" for idx, line in enumerate(lines, 1)),
                 quarter=quarter
             )
         },
-    ]
-    return messages
+    )
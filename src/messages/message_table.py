@@ -1,4 +1,7 @@
-from typing import Dict, List
+from typing import Dict, List, Tuple
+
+from ._budget import DEFAULT_CONTEXT_WINDOW, DEFAULT_MAX_COMPLETION_TOKENS, max_payload_tokens
+from ._template import PromptTemplate, compact_prompt
 
 FILE_8K_TABLE_ROW_WISE_EXTRACT_SYSTEM = """
 <task>
@@ -23,7 +26,7 @@ This is the first stage of a two-stage extraction process where your goal is to
         (e.g., "Total Revenue" in row header and column separated by "actual" and "percentage of total" -> two metrics: "Total Revenue" and "Total Revenue (percentage)")
     *   Clarify the hierachy among row headers then generate representative title for each row.
         (e.g., "Revenue:" in row header without values in the row and Segment names in row headers below. -> "Segment name Revenue")
-    *   If the same metric is broken down into different sectors or segments, extract the title as "{{Segment name}} {{metric name}}".
+    *   If the same metric is broken down into different sectors or segments, extract the title as "{Segment name} {metric name}".
         If the row header only contains name of sector, try to find the metric name (e.g., "Operating Income") in the upper row header.
         Same metric broken down into different sectors or segments should be extracted as distinct metrics.
         (e.g., "Revenue" in row header and "Food & Beverage" in lower row header -> "Food & Beverage Revenue")
@@ -55,21 +58,25 @@ This is the first stage of a two-stage extraction process where your goal is to
 <format>
 Return your output in the following JSON format:
 ```json
-{{
+{
     "data": [
-        {{
+        {
             "title": string | "None" /** name of the KPI metrics */,
             "unit": string | "None" /** unit of the KPI metrics */,
             "type_": "actual" | "expected" | "None" /** type of the KPI metrics */,
             "category": "Financials" | "KPI" | "Guidance" | "Unclear" /** category of the KPI metrics */
-        }},
+        },
         ... /** list of rows/metrics in the table */
     ]
-}}
+}
 ```
 </format>
 """
 
+FILE_8K_TABLE_ROW_WISE_EXTRACT_SYSTEM_MESSAGE = {
+    "role": "system", "content": compact_prompt(FILE_8K_TABLE_ROW_WISE_EXTRACT_SYSTEM)
+}
+
 FILE_8K_TABLE_ROW_WISE_EXTRACT_USER = """
 Analyze the following table based on the provided context.
 
@@ -86,32 +93,30 @@ Analyze the following table based on the provided context.
 </table>
 """
 
+FILE_8K_TABLE_ROW_WISE_EXTRACT_USER_TEMPLATE = PromptTemplate(FILE_8K_TABLE_ROW_WISE_EXTRACT_USER)
+
 
 def get_table_row_wise_messages(
         company_name: str,
         table_data: str,
-        quarter: str) -> List[Dict[str, str]]:
+        quarter: str) -> Tuple[Dict[str, str], Dict[str, str]]:
     """
     Generates messages for the LLM to extract structured data from a given table.
     """
-    messages = [
-        {
-            "role": "system",
-            "content": FILE_8K_TABLE_ROW_WISE_EXTRACT_SYSTEM
-        },
+    return (
+        FILE_8K_TABLE_ROW_WISE_EXTRACT_SYSTEM_MESSAGE,
         {
             "role": "user",
-            "content": FILE_8K_TABLE_ROW_WISE_EXTRACT_USER.format(
+            "content": FILE_8K_TABLE_ROW_WISE_EXTRACT_USER_TEMPLATE.format(
                 company_name=company_name,
                 table_data=table_data,
                 quarter=quarter
             )
         },
-    ]
-    return messages
+    )
 
 
-FILE_8K_TABLE_CELL_WISE_EXTRACT_SYSTEM = f"""
+FILE_8K_TABLE_CELL_WISE_EXTRACT_SYSTEM = """
 <task>
 You are a financial analyst reviewing a table from an 8-K report for a specific firm.
 Your task is to analyze the table refer to the provided "context" of text.
@@ -133,14 +138,9 @@ This is the second stage of a two-stage extraction process, where you are given
     *   Negative values are represented with parentheses. If so, return as -%d and remove the parentheses.
     *   Remove the unit of value. Unit should already be defined in the metric.
     *   If the value is not specified as numeric value in the table, return "None".
-4.  **Determine the Period:**
-    *   Extract the specific fiscal period the KPI value applies to (e.g., "2023 Q1", "2024 Full Year").
-    *   This might be mentioned directly in the *column header* of table or inferred from the reporting_quarter.
-    *   If the type is "actual", the period should be formatted as "YYYY QN" or "YYYY Full Year".
-    *   If the type is "expected", the period should be formatted as "(Expected) YYYY QN" or "(Expected) YYYY Full Year".
-    *   If no specific period is mentioned, the period should be "None".
-    *   There might expressions like "Three months ended" or "Year ended" on the column header.
-        In this case, extract the period as "YYYY QN" or "YYYY Full Year" based on the context.
+4.  **Determine the Period** the KPI value applies to:
+    *   Period format: actual → "YYYY QN" | "YYYY Full Year"; expected → prefix with "(Expected) "; unknown → "None".
+    *   Read it from the *column header* of the table (e.g., "Three months ended", "Year ended") or infer it from the reporting_quarter.
 5.  **TIP:**
     *   Table has period information in the column header, but not directly in the same column of cell. 
         Refer to the last non-null column header to determine the period.
@@ -153,19 +153,23 @@ This is the second stage of a two-stage extraction process, where you are given
 <format>
 Return your output in the following JSON format:
 ```json
-{{
+{
     "data": [
-        {{
+        {
             "value": string | "None" /** value in each cells of table */,
-            "period": "YYYY QN | YYYY Full Year" | "(Expected) YYYY QN | (Expected) YYYY Full Year" | "None" /** period of the KPI reported in the table */
-        }},
+            "period": string /** period of the KPI value, in the period format above */
+        },
         ... /** list of values for the metric from the table */
     ]
-}}
+}
 ```
 </format>   
 """
 
+FILE_8K_TABLE_CELL_WISE_EXTRACT_SYSTEM_MESSAGE = {
+    "role": "system", "content": compact_prompt(FILE_8K_TABLE_CELL_WISE_EXTRACT_SYSTEM)
+}
+
 FILE_8K_TABLE_CELL_WISE_EXTRACT_USER = """
 Analyze the following table based on the provided context. 
 Extract all values and periods for a specific metric in the table.
@@ -190,6 +194,8 @@ Category: {metric_category}
 </table>
 """
 
+FILE_8K_TABLE_CELL_WISE_EXTRACT_USER_TEMPLATE = PromptTemplate(FILE_8K_TABLE_CELL_WISE_EXTRACT_USER)
+
 
 def get_table_cell_wise_messages(
         company_name: str,
@@ -199,7 +205,7 @@ def get_table_cell_wise_messages(
         metric_unit: str = "",
         metric_type: str = "",
         metric_category: str = ""
-) -> List[Dict[str, str]]:
+) -> Tuple[Dict[str, str], Dict[str, str]]:
     """
     Generates messages for the LLM to extract cell values for a specific metric from a table.
 
@@ -212,14 +218,11 @@ def get_table_cell_wise_messages(
         metric_type: Type of the metric (actual or expected)
         metric_category: Category of the metric
     """
-    messages = [
-        {
-            "role": "system",
-            "content": FILE_8K_TABLE_CELL_WISE_EXTRACT_SYSTEM
-        },
+    return (
+        FILE_8K_TABLE_CELL_WISE_EXTRACT_SYSTEM_MESSAGE,
         {
             "role": "user",
-            "content": FILE_8K_TABLE_CELL_WISE_EXTRACT_USER.format(
+            "content": FILE_8K_TABLE_CELL_WISE_EXTRACT_USER_TEMPLATE.format(
                 company_name=company_name,
                 table_data=table_data,
                 quarter=quarter,
@@ -229,5 +232,141 @@ def get_table_cell_wise_messages(
                 metric_category=metric_category
             )
         },
+    )
+
+
+def get_table_cell_wise_max_input_tokens(
+        context_window: int = DEFAULT_CONTEXT_WINDOW,
+        max_completion_tokens: int = DEFAULT_MAX_COMPLETION_TOKENS,
+) -> int:
+    """
+    Returns how many tokens the table and metric of a `get_table_cell_wise_messages` request may take together.
+
+    Args:
+        context_window: Context window of the model
+        max_completion_tokens: Tokens reserved for the completion
+    """
+    return max_payload_tokens(
+        FILE_8K_TABLE_CELL_WISE_EXTRACT_SYSTEM_MESSAGE,
+        FILE_8K_TABLE_CELL_WISE_EXTRACT_USER_TEMPLATE,
+        context_window,
+        max_completion_tokens,
+    )
+
+
+FILE_8K_TABLE_MULTI_CELL_WISE_EXTRACT_SYSTEM = """
+<task>
+You are a financial analyst reviewing a table from an 8-K report for a specific firm.
+Your task is to analyze the table refer to the provided "context" of text.
+This is the second stage of a two-stage extraction process, where you are given a numbered list of metrics and need to extract all values and periods for each of these metrics from the table.
+</task>
+
+<context>
+- The "company_name" is the name of the firm.
+- The "reporting_quarter" refers to the reporting financial period of the 8-K document itself (e.g., "2023 Q4").
+</context>
+
+<guideline>
+1.  **Analyze the "table" within the context.**
+2.  **Handle every metric** in the numbered "metrics" list independently. The metric title, unit, type, and category are already extracted.
+3.  **Extract the value of the KPI metrics:**
+    *   Extract the value of the KPI from each cell in the table that corresponds to the metric.
+    *   Since table parsed implementation is not perfect, some values might be separated into multiple cells.
+    *   In this case, concatenate the values from multiple cells to form the complete value.
+    *   Negative values are represented with parentheses. If so, return as -%d and remove the parentheses.
+    *   Remove the unit of value. Unit should already be defined in the metric.
+    *   If the value is not specified as numeric value in the table, return "None".
+4.  **Determine the Period** the KPI value applies to:
+    *   Period format: actual → "YYYY QN" | "YYYY Full Year"; expected → prefix with "(Expected) "; unknown → "None".
+    *   Read it from the *column header* of the table (e.g., "Three months ended", "Year ended") or infer it from the reporting_quarter.
+5.  **TIP:**
+    *   Table has period information in the column header, but not directly in the same column of cell.
+        Refer to the last non-null column header to determine the period.
+    *   Since the input table is created by horizontally splitting merged cells, you should examine horizontally adjacent multiple cells
+        and concatenate them to form the complete value.
+    *   Output data might contain values in duplicated (metric, period, value) tuples for multiple cells.
+        Only return distinct values for (metric, period, value) tuples.
+</guideline>
+
+<format>
+Return your output in the following JSON format, with exactly one entry in "results" per metric:
+```json
+{
+    "results": [
+        {
+            "metric_index": integer /** number of the metric in the "metrics" list */,
+            "data": [
+                {
+                    "value": string | "None" /** value in each cells of table */,
+                    "period": string /** period of the KPI value, in the period format above */
+                },
+                ... /** list of values for the metric from the table */
+            ]
+        },
+        ... /** one entry per metric */
     ]
-    return messages
+}
+```
+</format>
+"""
+
+FILE_8K_TABLE_MULTI_CELL_WISE_EXTRACT_SYSTEM_MESSAGE = {
+    "role": "system", "content": compact_prompt(FILE_8K_TABLE_MULTI_CELL_WISE_EXTRACT_SYSTEM)
+}
+
+FILE_8K_TABLE_MULTI_CELL_WISE_EXTRACT_USER = """
+Analyze the following table based on the provided context.
+Extract all values and periods for each of the numbered metrics in the table.
+
+<company_name>
+{company_name}
+</company_name>
+
+<reporting_quarter>
+{quarter}
+</reporting_quarter>
+
+<metrics>
+{metrics}
+</metrics>
+
+<table>
+{table_data}
+</table>
+"""
+
+FILE_8K_TABLE_MULTI_CELL_WISE_EXTRACT_USER_TEMPLATE = PromptTemplate(FILE_8K_TABLE_MULTI_CELL_WISE_EXTRACT_USER)
+
+
+def get_table_multi_cell_wise_messages(
+        company_name: str,
+        table_data: str,
+        quarter: str,
+        metrics: List[Dict[str, str]],
+) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    Generates messages for the LLM to extract cell values for several metrics of the same table in one request.
+
+    Args:
+        company_name: Name of the company
+        table_data: CSV or markdown representation of the table
+        quarter: Reporting quarter
+        metrics: Metrics to extract values for, each with title, unit, type_ and category;
+            the model refers to them by their 1-based position in this list
+    """
+    return (
+        FILE_8K_TABLE_MULTI_CELL_WISE_EXTRACT_SYSTEM_MESSAGE,
+        {
+            "role": "user",
+            "content": FILE_8K_TABLE_MULTI_CELL_WISE_EXTRACT_USER_TEMPLATE.format(
+                company_name=company_name,
+                table_data=table_data,
+                quarter=quarter,
+                metrics="\n".join(
+                    f"{idx}. Title: {metric.get('title', '')} | Unit: {metric.get('unit', '')} | "
+                    f"Type: {metric.get('type_', '')} | Category: {metric.get('category', '')}"
+                    for idx, metric in enumerate(metrics, 1)
+                )
+            )
+        },
+    )
@@ -1,9 +1,26 @@
 import re
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Tag
 
 from src.utils import is_numeric_value
 
+# Same parser as html_utils: lxml would wrap loose text in <p> and close <p> before <table>, changing which
+# text ends up in front of a table
+_HTML_PARSER = "html.parser"
+
+# Inline-style patterns read for every row label, compiled once
+_PADDING_RES = (
+    re.compile(r'padding-left:\s*(-?\d+(?:\.\d+)?)(pt|px|em|rem)'),
+    # padding: top right bottom left
+    re.compile(
+        r'padding:\s*(-?\d+(?:\.\d+)?)(?:pt|px|em|rem)?\s+(-?\d+(?:\.\d+)?)(?:pt|px|em|rem)?\s+(-?\d+(?:\.\d+)?)(?:pt|px|em|rem)?\s+(-?\d+(?:\.\d+)?)(?:pt|px|em|rem)?'
+    ),
+    # padding: vertical horizontal
+    re.compile(r'padding:\s*(-?\d+(?:\.\d+)?)(?:pt|px|em|rem)?\s+(-?\d+(?:\.\d+)?)(?:pt|px|em|rem)?'),
+)
+_TEXT_INDENT_RE = re.compile(r'text-indent:\s*(-?\d+(?:\.\d+)?)(pt|px|em|rem)')
+_MARGIN_LEFT_RE = re.compile(r'margin-left:\s*(-?\d+(?:\.\d+)?)(pt|px|em|rem)')
+
 
 def parse_html_table(raw_html: str) -> list[dict]:
     """
@@ -25,7 +42,7 @@ def parse_html_table(raw_html: str) -> list[dict]:
     clean_html = raw_html.replace("\\n", "\n")  # Escape sequence correction if needed
 
     # (2) Parse with BeautifulSoup
-    soup = BeautifulSoup(clean_html, "html.parser")
+    soup = BeautifulSoup(clean_html, _HTML_PARSER)
     table = soup.find("table")
     if not table:
         return []  # Return empty list if no table found
@@ -69,7 +86,7 @@ def extract_table_with_preceding_text(html_content: str) -> list:
     Returns:
         list: Each element is in the form {'content': 'text+table', 'table_only': 'table only'}
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
+    soup = BeautifulSoup(html_content, _HTML_PARSER)
 
     # Get all elements in order
     all_elements = soup.find_all(['p', 'div', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'table'])
@@ -94,9 +111,8 @@ def extract_table_with_preceding_text(html_content: str) -> list:
                 if text_content:  # Only if not empty text
                     preceding_text += text_content + "\n"
 
-            # Extract table HTML
-            table_html = str(element)
-            table_html = parse_html_table_to_markdown(table_html)
+            # Convert the already-parsed table (no re-serialize/re-parse round trip)
+            table_html = _table_tag_to_markdown(element)
 
             # Create chunk combining text and table
             combined_content = preceding_text.strip()
@@ -131,11 +147,16 @@ def parse_html_table_to_markdown(raw_html: str) -> str:
         str: A CSV-formatted string preserving the original table's layout.
     """
     clean_html = raw_html.replace("\\n", "\n")
-    soup = BeautifulSoup(clean_html, "html.parser")
+    soup = BeautifulSoup(clean_html, _HTML_PARSER)
     table = soup.find("table")
     if not table:
         return ""
 
+    return _table_tag_to_markdown(table)
+
+
+def _table_tag_to_markdown(table: Tag) -> str:
+    """Converts an already-parsed `<table>` tag into the markdown layout of `parse_html_table_to_markdown`."""
     writer = []
 
     for row in table.find_all("tr"):
@@ -155,16 +176,8 @@ def parse_html_table_to_markdown(raw_html: str) -> str:
                     style = p_tag["style"]
             if style:
                 # Look for various padding patterns
-                padding_patterns = [
-                    r'padding-left:\s*(-?\d+(?:\.\d+)?)(pt|px|em|rem)',
-                    r'padding:\s*(-?\d+(?:\.\d+)?)(?:pt|px|em|rem)?\s+(-?\d+(?:\.\d+)?)(?:pt|px|em|rem)?\s+(-?\d+(?:\.\d+)?)(?:pt|px|em|rem)?\s+(-?\d+(?:\.\d+)?)(?:pt|px|em|rem)?',
-                    # padding: top right bottom left
-                    r'padding:\s*(-?\d+(?:\.\d+)?)(?:pt|px|em|rem)?\s+(-?\d+(?:\.\d+)?)(?:pt|px|em|rem)?',
-                    # padding: vertical horizontal
-                ]
-
-                for pattern in padding_patterns:
-                    padding_match = re.search(pattern, style)
+                for pattern in _PADDING_RES:
+                    padding_match = pattern.search(style)
                     if padding_match:
                         value = float(padding_match.group(1))
                         unit = padding_match.group(2) if len(padding_match.groups()) > 1 else 'px'
@@ -182,7 +195,7 @@ def parse_html_table_to_markdown(raw_html: str) -> str:
 
                 # Also check for text-indent
                 if not indent_px:
-                    text_indent_match = re.search(r'text-indent:\s*(-?\d+(?:\.\d+)?)(pt|px|em|rem)', style)
+                    text_indent_match = _TEXT_INDENT_RE.search(style)
                     if text_indent_match:
                         value = float(text_indent_match.group(1))
                         unit = text_indent_match.group(2)
@@ -198,7 +211,7 @@ def parse_html_table_to_markdown(raw_html: str) -> str:
 
                 # Check for margin-left
                 if not indent_px:
-                    margin_match = re.search(r'margin-left:\s*(-?\d+(?:\.\d+)?)(pt|px|em|rem)', style)
+                    margin_match = _MARGIN_LEFT_RE.search(style)
                     if margin_match:
                         value = float(margin_match.group(1))
                         unit = margin_match.group(2)
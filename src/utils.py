@@ -1,57 +1,51 @@
-import json
+import functools
 import logging
 import os
+import re
 from datetime import datetime
-from typing import Any, Dict, List, Set
+from typing import Any, Callable, Dict, List, Set, Tuple
 
 import dotenv
+import orjson
 import pandas as pd
 import requests
 from bs4 import BeautifulSoup
 from nltk import sent_tokenize, word_tokenize
-from tenacity import retry, stop_after_attempt, wait_fixed
-
-from src._default import DEFAULT_EMPTY_PARSED_COMPLETION
 
 logger = logging.getLogger(__name__)
 
 dotenv.load_dotenv()
 
-
-def handle_max_retries(retry_state):
-    """Logs only the last error message after max retries are exhausted."""
-    last_exception = retry_state.outcome.exception()
-    if last_exception:
-        logging.error(f"Task {retry_state.args[0]} failed after max retries: {str(last_exception)[:20]}")
-    return DEFAULT_EMPTY_PARSED_COMPLETION
-
-
-# Create a reusable decorator for retrying async functions
-def retry_fetch(wait_seconds: int, max_retries: int):
-    return retry(
-        stop=stop_after_attempt(max_retries),  # Retry any exception up to 3 times
-        wait=wait_fixed(wait_seconds),  # Wait 1 second between retries
-        retry_error_callback=handle_max_retries  # Log only the last error
-    )
+# Line breaks (and the whitespace around them) that always end a sentence
+_LINE_BREAK_RE = re.compile(r"\s*\n\s*")
+_DIGIT_RE = re.compile(r"[0-9]")
 
 
 def get_sentences(text: str):
     """
     Tokenizes the given text into sentences using NLTK's `sent_tokenize`.
 
+    Line breaks are treated as hard sentence boundaries; blank lines are skipped without
+    invoking the tokenizer. Results are memoized per text, since the same chunk is often
+    tokenized more than once within a filing.
+
     Args:
         text (`str`): The text to be tokenized into sentences.
 
     Returns:
         `List[str]`: A list of sentences extracted from the text.
     """
-    text_sentences = text.split("\n")  # Split text into lines
-    sentences = []
-    for sentence in text_sentences:
-        # Tokenize each line into sentences
-        sentences.extend(sent_tokenize(sentence))
+    return list(_get_sentences_cached(text))
+
 
-    return sentences
+@functools.lru_cache(maxsize=1024)
+def _get_sentences_cached(text: str) -> Tuple[str, ...]:
+    return tuple(
+        sentence
+        for line in _LINE_BREAK_RE.split(text)
+        if line
+        for sentence in sent_tokenize(line)
+    )
 
 
 def split_transcript_into_n(text: str, n: int) -> List[str]:
@@ -147,7 +141,8 @@ def get_ticker_set(
     # Filter the DataFrame by date range
     filtered_df = dataframe[(dataframe.index >= start_date) & (dataframe.index <= end_date)]
 
-    print(filtered_df)
+    # Lazy %-formatting: the DataFrame is only rendered when debug logging is enabled
+    logger.debug("Rows in date range:\n%s", filtered_df)
 
     if filtered_df.empty:
         raise ValueError("No data found in the specified date range.")
@@ -158,11 +153,15 @@ def get_ticker_set(
     # Split tickers in each row and find the common subset
     tickers_sets = [set(row.split(',')) for row in filtered_df['tickers']]
     common_tickers = set.intersection(*tickers_sets)
-    print(common_tickers)
-    print(len(common_tickers))
+    logger.debug("%d common tickers: %s", len(common_tickers), common_tickers)
     return {t.strip() for t in common_tickers}
 
 
+def has_digit(text: str) -> bool:
+    """Checks if a string contains an ASCII digit, i.e. could state a metric value at all."""
+    return _DIGIT_RE.search(text) is not None
+
+
 def is_numeric_value(text: str) -> bool:
     """Checks if a string represents a numeric value, handling currency, commas, and parentheses."""
     if not isinstance(text, str):
@@ -208,12 +207,11 @@ def chunk_10k_10q_html(text: str) -> Dict[int, str]:
     # Find all p tags and table tags and sort them in document order
     elements = soup.find_all(['p', 'table'])
 
-    # Process in order
+    # Process in order (`.text` walks the element's subtree, so it is computed and stripped once)
     for idx, element in enumerate(elements):
-        if element.name == 'p' and element.text.strip():
-            chunks[idx] = element.text.strip()
-        elif element.name == 'table' and element.text.strip():
-            chunks[idx] = element.text.strip()
+        content = element.text.strip()
+        if content:
+            chunks[idx] = content
 
     return chunks
 
@@ -238,8 +236,9 @@ def chunk_earnings_html(text: str) -> Dict[int, str]:
 
             # Check and process if span exists
             if ' - ' in speaker_text:
-                speaker_name = speaker_text.split(' - ')[0].strip()
-                speaker_role = speaker_text.split(' - ')[1].strip()
+                speaker_parts = speaker_text.split(' - ', 2)
+                speaker_name = speaker_parts[0].strip()
+                speaker_role = speaker_parts[1].strip()
                 formatted_speaker = f"{speaker_name} - {speaker_role}"
             else:
                 formatted_speaker = speaker_text
@@ -264,7 +263,7 @@ def chunk_8k_json(text: str) -> Dict[int, str]:
     Returns:
         Dict[int, str]: Dictionary with index-text pairs
     """
-    data = json.loads(text)
+    data = orjson.loads(text)
     chunks = {}
     idx = 0
 
@@ -284,7 +283,7 @@ def chunk_def14a_json(text: str) -> Dict[int, str]:
     Returns:
         Dict[int, str]: Dictionary with index-text pairs
     """
-    data = json.loads(text)
+    data = orjson.loads(text)
     chunks = {}
     idx = 0
 
@@ -293,13 +292,28 @@ def chunk_def14a_json(text: str) -> Dict[int, str]:
         # Consider each item as one chunk
         if isinstance(item, dict):
             # Check if main text field exists
-            if "content" in item and item["content"].strip():
-                chunks[idx] = item["content"].strip()
+            content = item["content"].strip() if "content" in item else ""
+            if content:
+                chunks[idx] = content
                 idx += 1
 
     return chunks
 
 
+def _chunk_lines(text: str) -> Dict[int, str]:
+    return dict(enumerate(text.split("\n")))
+
+
+# Chunking method for each file type; other types are chunked by newline
+_CHUNKERS: Dict[str, Callable[[str], Dict[int, str]]] = {
+    "10-K": chunk_10k_10q_html,
+    "10-Q": chunk_10k_10q_html,
+    "8-K": chunk_8k_json,
+    "DEF14A": chunk_def14a_json,
+    "Earnings": chunk_earnings_html,
+}
+
+
 def get_chunk(text: str, file_type: str) -> Dict[int, str]:
     """
     Calls the appropriate chunking method based on file type.
@@ -311,26 +325,17 @@ def get_chunk(text: str, file_type: str) -> Dict[int, str]:
     Returns:
         Dict[int, str]: Dictionary with index-text pairs
     """
-    if file_type == "10-K" or file_type == "10-Q":
-        return chunk_10k_10q_html(text)
-    elif file_type == "8-K":
-        return chunk_8k_json(text)
-    elif file_type == "DEF14A":
-        return chunk_def14a_json(text)
-    elif file_type == "Earnings":
-        return chunk_earnings_html(text)
-    else:
-        # Default chunking by newline
-        chunks = {}
-        for idx, line in enumerate(text.split("\n")):
-            chunks[idx] = line
-        return chunks
+    # Types without a dedicated chunker fall back to chunking by newline
+    return _CHUNKERS.get(file_type, _chunk_lines)(text)
+
+
+def token_set(text: str) -> Set[str]:
+    """Returns the set of lowercased word tokens of `text`, as compared by `duplicate_token_count`."""
+    return set(word_tokenize(text.lower()))
 
 
 def duplicate_token_count(text_a: str, text_b: str) -> int:
-    tokens_a = set(word_tokenize(text_a.lower()))
-    tokens_b = set(word_tokenize(text_b.lower()))
-    return len(tokens_a & tokens_b)
+    return len(token_set(text_a) & token_set(text_b))
 
 
 def check_valid_value(html_content: str, value: str) -> str: